@@ -1,9 +1,6 @@
 from asreviewcontrib.insights.metrics import erf
 from asreviewcontrib.insights.metrics import recall
 from asreviewcontrib.insights.metrics import wss
-from asreviewcontrib.insights.plot import plot_erf
-from asreviewcontrib.insights.plot import plot_recall
-from asreviewcontrib.insights.plot import plot_wss
 
 try:
     from asreviewcontrib.insights._version import __version__
@@ -13,4 +10,29 @@ except ImportError:
     __version_tuple__ = (0, 0, 0)
 
 
-__all__ = ["plot_recall", "plot_wss", "plot_erf", "erf", "recall", "wss"]
+__all__ = [
+    "plot_recall",
+    "plot_wss",
+    "plot_erf",
+    "plot_multiple",
+    "erf",
+    "recall",
+    "wss",
+]
+
+# the plot functions are imported on first use, so the metrics do not pay for
+# importing the plotting code
+_PLOT_FUNCS = ["plot_recall", "plot_wss", "plot_erf", "plot_multiple"]
+
+
+def __getattr__(name):
+    if name in _PLOT_FUNCS:
+        from asreviewcontrib.insights import plot
+
+        return getattr(plot, name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted([*globals(), *_PLOT_FUNCS])
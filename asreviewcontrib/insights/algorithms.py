@@ -1,27 +1,266 @@
+import functools
+import inspect
+
 import numpy as np
 
 
-def _recall_values(labels, x_absolute=False, y_absolute=False):
-    n_docs = len(labels)
-    n_pos_docs = sum(labels)
+class LabelSet:
+    """Precomputed statistics of a set of labels in screening order.
+
+    The label set is stored as the positions of the relevant records and the
+    total number of records. The metrics are computed from the positions
+    only, in memory proportional to the number of relevant records. The
+    cumulative arrays over all records (true positives, false positives and
+    the random baseline) are only computed for the recall and ERF curves, once,
+    on first use.
+
+    Parameters
+    ----------
+    labels : list[0 | 1] | numpy.ndarray
+        Labels (0 or 1) in the order the records were screened.
+    """
+
+    def __init__(self, labels):
+        labels = np.asarray(labels)
+
+        self.n_docs = len(labels)
+        self.positions = _read_only(np.flatnonzero(labels))
+        self._curves = {}
+
+    @classmethod
+    def from_positions(cls, positions, n_docs):
+        """Create a label set from the positions of the relevant records.
+
+        Parameters
+        ----------
+        positions : list[int] | numpy.ndarray
+            Increasing positions (0-based) of the relevant records in the
+            screening order.
+        n_docs : int
+            Total number of records.
+        """
+        label_set = cls.__new__(cls)
+        label_set.n_docs = n_docs
+        label_set.positions = _read_only(np.asarray(positions, dtype=np.intp))
+        label_set._curves = {}
+
+        return label_set
+
+    @property
+    def n_pos_docs(self):
+        return len(self.positions)
+
+    @property
+    def n_neg_docs(self):
+        return self.n_docs - self.n_pos_docs
+
+    @functools.cached_property
+    def tp(self):
+        """Number of relevant records found after screening each record."""
+        found = np.zeros(self.n_docs, dtype=np.int32)
+        found[self.positions] = 1
+        return _read_only(np.cumsum(found, dtype=np.int32))
+
+    @functools.cached_property
+    def fp(self):
+        """Number of irrelevant records screened after screening each record."""
+        return _read_only(np.arange(1, self.n_docs + 1, dtype=np.int32) - self.tp)
+
+    @functools.cached_property
+    def random(self):
+        """Number of relevant records found when screening in random order."""
+        return _read_only(np.round(np.linspace(0, self.n_pos_docs, self.n_docs)))
+
+    @functools.cached_property
+    def positions_random(self):
+        """Positions of the relevant records when screening in random order."""
+        return _read_only(_positions_random(self.n_pos_docs, self.n_docs))
+
+    def tp_at(self, i):
+        """Number of relevant records found after screening record i."""
+        return np.searchsorted(self.positions, i, side="right")
+
+    def random_at(self, i):
+        """Number of relevant records found at record i in random order."""
+        return _random_at(i, self.n_pos_docs, self.n_docs)
+
+
+def _random_at(i, n_pos_docs, n_docs):
+    """Evaluate the random curve at the indices i.
+
+    Equal to `np.round(np.linspace(0, n_pos_docs, n_docs))[i]`, with the same
+    floating point operations as `np.linspace`, without creating the curve.
+    """
+    i = np.asarray(i)
+    if n_docs < 2:
+        return np.round(np.linspace(0, n_pos_docs, n_docs))[i]
+
+    values = np.round(i.astype(np.float64) * (float(n_pos_docs) / (n_docs - 1)))
+    return np.where(i == n_docs - 1, float(n_pos_docs), values)
+
+
+def _positions_random(n_pos_docs, n_docs):
+    """Positions of the relevant records when screening in random order.
+
+    The k-th relevant record is found at the first position where the random
+    curve reaches k. The curve is only evaluated around the positions, the
+    result is equal to `np.searchsorted(random, np.arange(1, n_pos_docs + 1))`.
+    """
+    k = np.arange(1, n_pos_docs + 1)
+    if n_docs < 2:
+        return np.searchsorted(_random_at(np.arange(n_docs), n_pos_docs, n_docs), k)
+
+    # the rounded curve reaches k at about (k - 0.5) / step, correct the
+    # estimate with the exact values of the curve
+    step = float(n_pos_docs) / (n_docs - 1)
+    i = np.clip(np.floor((k - 0.5) / step).astype(np.intp), 0, n_docs)
+
+    while True:
+        after = i > 0
+        after[after] = _random_at(i[after] - 1, n_pos_docs, n_docs) >= k[after]
+        if not after.any():
+            break
+        i[after] -= 1
+
+    while True:
+        before = i < n_docs
+        before[before] = _random_at(i[before], n_pos_docs, n_docs) < k[before]
+        if not before.any():
+            break
+        i[before] += 1
+
+    return i
+
+
+def _curve_index(n, intercept, x_absolute=False):
+    """Index of the value of a curve at the intercept.
+
+    For a curve with the x-values 1, ..., n (or 1/n, ..., 1 if not
+    `x_absolute`), the index of the last x-value at or before the intercept.
+    The index is -1 for an intercept before the first x-value. This is the
+    index used by `metrics._slice_metric`, without creating the x-values.
+    """
+    intercept = np.asarray(intercept, dtype=np.float64)
+
+    if x_absolute:
+        return np.clip(np.floor(intercept), 0, n).astype(np.intp) - 1
+
+    # count the x-values k / n <= intercept, starting from an estimate
+    count = np.clip(np.floor(intercept * n), 0, n).astype(np.intp)
+    while True:
+        too_low = (count < n) & ((count + 1) / n <= intercept)
+        if not too_low.any():
+            break
+        count = count + too_low
+
+    while True:
+        too_high = (count > 0) & (count / n > intercept)
+        if not too_high.any():
+            break
+        count = count - too_high
+
+    return count - 1
+
+
+def _as_label_set(labels):
+    if isinstance(labels, LabelSet):
+        return labels
+    return LabelSet(labels)
+
+
+def _is_multiple(labels):
+    """Check if labels contains multiple label sets.
+
+    Multiple label sets are given as a 2-D array with a run on each row, or as
+    a list of lists, arrays or LabelSet objects.
+    """
+    if isinstance(labels, LabelSet):
+        return False
+    if isinstance(labels, np.ndarray):
+        return labels.ndim == 2
+
+    return len(labels) > 0 and (
+        isinstance(labels[0], LabelSet) or np.ndim(labels[0]) > 0
+    )
+
+
+def _as_label_sets(labels):
+    """Convert one or multiple label sets to a list of LabelSet objects."""
+    if not _is_multiple(labels):
+        labels = [labels]
+
+    return [_as_label_set(label_set) for label_set in labels]
+
+
+def _read_only(a):
+    a.flags.writeable = False
+    return a
+
+
+def _cached_curve(func):
+    """Cache the (x, y) arrays of a curve on the label set.
+
+    The decorated function accepts labels or a LabelSet. The arrays are
+    contiguous and read-only, as they are shared by all callers. Counts are
+    returned as int32 arrays and fractions as float64 arrays.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(labels, *args, **kwargs):
+        label_set = _as_label_set(labels)
+
+        bound = signature.bind(label_set, *args, **kwargs)
+        bound.apply_defaults()
+        key = (func.__name__, *list(bound.arguments.values())[1:])
+
+        if key not in label_set._curves:
+            x, y = func(*bound.args, **bound.kwargs)
+            label_set._curves[key] = (_curve_array(x), _curve_array(y))
+
+        return label_set._curves[key]
+
+    return wrapper
 
-    x = np.arange(1, n_docs + 1)
-    recall = np.cumsum(labels)
+
+def _curve_array(a):
+    a = np.asarray(a)
+    dtype = np.int32 if np.issubdtype(a.dtype, np.integer) else np.float64
+
+    return _read_only(np.ascontiguousarray(a, dtype=dtype))
+
+
+def _as_lists(values):
+    """Convert the (x, y) arrays of a curve to lists.
+
+    For code that relies on the list output of the `_*_values` functions in
+    earlier versions, e.g. `_as_lists(_recall_values(labels))`.
+    """
+    x, y = values
+
+    return x.tolist(), y.tolist()
+
+
+@_cached_curve
+def _recall_values(label_set, x_absolute=False, y_absolute=False):
+    x = np.arange(1, label_set.n_docs + 1)
+    recall = label_set.tp
 
     if not x_absolute:
-        x = x / n_docs
+        x = x / label_set.n_docs
 
     if y_absolute:
         y = recall
     else:
-        y = recall / n_pos_docs
+        y = recall / label_set.n_pos_docs
 
-    return x.tolist(), y.tolist()
+    return x, y
 
 
 def _loss_value(labels):
-    Ny = sum(labels)
-    Nx = len(labels)
+    label_set = _as_label_set(labels)
+    Ny = label_set.n_pos_docs
+    Nx = label_set.n_docs
 
     if Ny == 0 or Nx == Ny:
         raise ValueError("Need both 0 and 1 labels")
@@ -32,8 +271,10 @@ def _loss_value(labels):
     #    curve, is the total area, Nx * Ny, minus the area above the stepwise
     #    curve, (Ny * (Ny - 1)) / 2. Combined to Ny * (Nx - (Ny - 1)) / 2.
     #
-    # 2. The "actual" AUC is the cumulative recall sum, calculated with
-    #    np.cumsum(labels).sum().
+    # 2. The "actual" AUC is the cumulative recall sum, np.cumsum(labels).sum().
+    #    A relevant record at (0-based) position p adds 1 to the cumulative
+    #    recall of the Nx - p records from p on, so the sum is computed from
+    #    the positions only.
     #
     # 3. The "worst" AUC, where all positive labels are clustered at the end, is
     #    calculated as (Ny * (Ny + 1)) / 2. To normalize, we need the difference
@@ -46,22 +287,18 @@ def _loss_value(labels):
     #
     # Finally, we compute the normalized loss as:
     # (optimal - actual) / (optimal - worst).
-    return float(
-        (Ny * (Nx - (Ny - 1) / 2) - np.cumsum(labels).sum()) / (Ny * (Nx - Ny))
-    )  # noqa: E501
+    actual = (Nx - label_set.positions).sum(dtype=np.int64)
 
+    return float((Ny * (Nx - (Ny - 1) / 2) - actual) / (Ny * (Nx - Ny)))
 
-def _wss_values(labels, x_absolute=False, y_absolute=False):
-    n_docs = len(labels)
-    n_pos_docs = sum(labels)
 
-    docs_found = np.cumsum(labels)
-    docs_found_random = np.round(np.linspace(0, n_pos_docs, n_docs))
+@_cached_curve
+def _wss_values(label_set, x_absolute=False, y_absolute=False):
+    n_docs = label_set.n_docs
+    n_pos_docs = label_set.n_pos_docs
 
-    # Get the first occurrence of 1, 2, 3, ..., n_pos_docs in both arrays.
-    when_found = np.searchsorted(docs_found, np.arange(1, n_pos_docs + 1))
-    when_found_random = np.searchsorted(docs_found_random, np.arange(1, n_pos_docs + 1))
-    n_found_earlier = when_found_random - when_found
+    # The first occurrence of 1, 2, 3, ..., n_pos_docs in both screening orders.
+    n_found_earlier = label_set.positions_random - label_set.positions
 
     x = np.arange(1, n_pos_docs + 1)
     if not x_absolute:
@@ -72,17 +309,14 @@ def _wss_values(labels, x_absolute=False, y_absolute=False):
     else:
         y = n_found_earlier / n_docs
 
-    return x.tolist(), y.tolist()
+    return x, y
 
 
-def _erf_values(labels, x_absolute=False, y_absolute=False):
-    n_docs = len(labels)
-    n_pos_docs = sum(labels)
+@_cached_curve
+def _erf_values(label_set, x_absolute=False, y_absolute=False):
+    n_docs = label_set.n_docs
 
-    docs_found = np.cumsum(labels)
-    docs_found_random = np.round(np.linspace(0, n_pos_docs, n_docs))
-
-    extra_records_found = docs_found - docs_found_random
+    extra_records_found = label_set.tp - label_set.random
 
     x = np.arange(1, n_docs + 1)
     if not x_absolute:
@@ -91,76 +325,247 @@ def _erf_values(labels, x_absolute=False, y_absolute=False):
     if y_absolute:
         y = extra_records_found
     else:
-        y = extra_records_found / n_pos_docs
+        y = extra_records_found / label_set.n_pos_docs
 
-    return x.tolist(), y.tolist()
+    return x, y
 
 
-def _tp_values(labels, x_absolute=False):
-    n_pos_docs = sum(labels)
-    tp = np.cumsum(labels, dtype=int)
-
-    x = np.arange(1, n_pos_docs + 1)
+def _cm_x(label_set, x_absolute):
+    x = np.arange(1, label_set.n_pos_docs + 1)
 
     if not x_absolute:
-        x = x / n_pos_docs
+        x = x / label_set.n_pos_docs
 
-    when_found = np.searchsorted(tp, np.arange(1, n_pos_docs + 1))
-    y = tp[when_found]
+    return x
 
-    return x.tolist(), y.tolist()
 
+def _cm_tp(label_set):
+    # the k-th relevant record is found at its position
+    return np.arange(1, label_set.n_pos_docs + 1)
 
-def _fp_values(labels, x_absolute=False):
-    n_pos_docs = sum(labels)
-    n_docs = len(labels)
-    tp = np.cumsum(labels, dtype=int)
-    x = np.arange(1, n_docs + 1)
-    fp = x - tp
 
-    x = np.arange(1, n_pos_docs + 1)
+def _cm_fp(label_set):
+    # before the k-th relevant record, k - 1 relevant records are screened
+    return label_set.positions - np.arange(label_set.n_pos_docs)
 
-    if not x_absolute:
-        x = x / n_pos_docs
 
-    when_found = np.searchsorted(tp, np.arange(1, n_pos_docs + 1))
-    y = fp[when_found]
+@_cached_curve
+def _tp_values(label_set, x_absolute=False):
+    x = _cm_x(label_set, x_absolute)
+    y = _cm_tp(label_set)
 
-    return x.tolist(), y.tolist()
+    return x, y
 
 
-def _tn_values(labels, x_absolute=False):
-    n_pos_docs = sum(labels)
-    n_docs = len(labels)
-    tp = np.cumsum(labels, dtype=int)
-    x = np.arange(1, n_docs + 1)
-    n_excludes = labels.count(0)
-    fp = x - tp
-    tn = n_excludes - fp
+@_cached_curve
+def _fp_values(label_set, x_absolute=False):
+    x = _cm_x(label_set, x_absolute)
+    y = _cm_fp(label_set)
 
-    x = np.arange(1, n_pos_docs + 1)
+    return x, y
 
-    if not x_absolute:
-        x = x / n_pos_docs
 
-    when_found = np.searchsorted(tp, np.arange(1, n_pos_docs + 1))
-    y = tn[when_found]
+@_cached_curve
+def _tn_values(label_set, x_absolute=False):
+    x = _cm_x(label_set, x_absolute)
+    y = label_set.n_neg_docs - _cm_fp(label_set)
 
-    return x.tolist(), y.tolist()
+    return x, y
 
 
-def _fn_values(labels, x_absolute=False):
-    n_pos_docs = sum(labels)
-    n_includes = int(sum(labels))
-    tp = np.cumsum(labels, dtype=int)
-    fn = n_includes - tp
+@_cached_curve
+def _fn_values(label_set, x_absolute=False):
+    x = _cm_x(label_set, x_absolute)
+    y = label_set.n_pos_docs - _cm_tp(label_set)
 
-    x = np.arange(1, n_pos_docs + 1)
+    return x, y
+
+
+def _recall_at(label_set, intercept, x_absolute=False, y_absolute=False):
+    """Recall at the intercepts, from the positions of the relevant records.
+
+    Returns the values of `_recall_values` at the index of each intercept,
+    see `_curve_index`.
+    """
+    i = _curve_index(label_set.n_docs, intercept, x_absolute=x_absolute)
+    y = label_set.tp_at(i % label_set.n_docs)
+
+    if not y_absolute:
+        y = y / label_set.n_pos_docs
+
+    return y
+
+
+def _erf_at(label_set, intercept, x_absolute=False, y_absolute=False):
+    """ERF at the intercepts, from the positions of the relevant records.
+
+    Returns the values of `_erf_values` at the index of each intercept, see
+    `_curve_index`.
+    """
+    i = _curve_index(label_set.n_docs, intercept, x_absolute=x_absolute)
+    i = i % label_set.n_docs
+    y = label_set.tp_at(i) - label_set.random_at(i)
+
+    if not y_absolute:
+        y = y / label_set.n_pos_docs
+
+    return y
+
+
+class LabelMatrix:
+    """Precomputed statistics of multiple runs on the same dataset.
+
+    The runs are stored as a matrix with the labels of a run on each row. All
+    statistics are computed for all runs at once, along the rows of the
+    matrix.
+
+    Parameters
+    ----------
+    labels : numpy.ndarray
+        Array of shape (n_runs, n_docs) with the labels (0 or 1) of each run in
+        the order the records were screened, e.g. a uint8 array. A list of
+        equally long label lists or arrays is also accepted.
+    """
+
+    def __init__(self, labels):
+        labels = np.asarray(labels)
+
+        if labels.ndim != 2:
+            raise ValueError("Labels should be a 2-D array with a run on each row.")
+
+        self.n_runs, self.n_docs = labels.shape
+        self.tp = _read_only(np.cumsum(labels, axis=1, dtype=np.int32))
+        self.n_pos_docs = _read_only(
+            self.tp[:, -1].copy() if self.n_docs else np.zeros(self.n_runs, np.int32)
+        )
+        self.n_neg_docs = self.n_docs - self.n_pos_docs
+
+    def _check_equal_n_pos_docs(self):
+        if self.n_runs and not (self.n_pos_docs == self.n_pos_docs[0]).all():
+            raise ValueError(
+                "All runs should have the same number of relevant records."
+            )
+
+    @functools.cached_property
+    def random(self):
+        """Number of relevant records found when screening in random order."""
+        return _read_only(
+            np.round(np.linspace(0, self.n_pos_docs, self.n_docs, axis=1))
+        )
+
+    @functools.cached_property
+    def positions(self):
+        """Positions of the relevant records, with a run on each row."""
+        self._check_equal_n_pos_docs()
+
+        # the k-th relevant record of a run is found at the first position
+        # where the cumulative number of relevant records equals k
+        n_pos_docs = int(self.n_pos_docs[0]) if self.n_runs else 0
+        _, positions = np.nonzero(np.diff(self.tp, axis=1, prepend=0))
+
+        return _read_only(positions.reshape(self.n_runs, n_pos_docs))
+
+    @functools.cached_property
+    def positions_random(self):
+        """Positions of the relevant records when screening in random order."""
+        self._check_equal_n_pos_docs()
+
+        # all runs share the same random baseline
+        n_pos_docs = int(self.n_pos_docs[0]) if self.n_runs else 0
+
+        return _read_only(_positions_random(n_pos_docs, self.n_docs))
+
+
+def _as_label_matrix(labels):
+    """Convert one or multiple label sets of equal length to a LabelMatrix."""
+    if isinstance(labels, LabelMatrix):
+        return labels
+    if isinstance(labels, np.ndarray) and labels.ndim == 2:
+        return LabelMatrix(labels)
+    if not _is_multiple(labels):
+        labels = [labels]
+
+    n_docs = {
+        label_set.n_docs if isinstance(label_set, LabelSet) else len(label_set)
+        for label_set in labels
+    }
+    if len(n_docs) > 1:
+        raise ValueError("All runs should have the same number of records.")
+
+    matrix = np.zeros((len(labels), n_docs.pop()), dtype=np.uint8)
+    for row, label_set in zip(matrix, labels, strict=True):
+        if isinstance(label_set, LabelSet):
+            row[label_set.positions] = 1
+        else:
+            row[:] = label_set
+
+    return LabelMatrix(matrix)
+
+
+def _recall_matrix_values(label_matrix, x_absolute=False, y_absolute=False):
+    """Recall curves of all runs, with a run on each row of y."""
+    x = np.arange(1, label_matrix.n_docs + 1, dtype=np.int32)
 
+    if not x_absolute:
+        x = x / label_matrix.n_docs
+
+    if y_absolute:
+        y = label_matrix.tp
+    else:
+        y = label_matrix.tp / label_matrix.n_pos_docs[:, None]
+
+    return _curve_array(x), _curve_array(y)
+
+
+def _wss_matrix_values(label_matrix, x_absolute=False, y_absolute=False):
+    """WSS curves of all runs, with a run on each row of y."""
+    n_found_earlier = label_matrix.positions_random - label_matrix.positions
+    n_pos_docs = n_found_earlier.shape[1]
+
+    x = np.arange(1, n_pos_docs + 1, dtype=np.int32)
     if not x_absolute:
         x = x / n_pos_docs
 
-    when_found = np.searchsorted(tp, np.arange(1, n_pos_docs + 1))
-    y = fn[when_found]
+    if y_absolute:
+        y = n_found_earlier
+    else:
+        y = n_found_earlier / label_matrix.n_docs
 
-    return x.tolist(), y.tolist()
+    return _curve_array(x), _curve_array(y)
+
+
+def _erf_matrix_values(label_matrix, x_absolute=False, y_absolute=False):
+    """ERF curves of all runs, with a run on each row of y."""
+    extra_records_found = label_matrix.tp - label_matrix.random
+
+    x = np.arange(1, label_matrix.n_docs + 1, dtype=np.int32)
+    if not x_absolute:
+        x = x / label_matrix.n_docs
+
+    if y_absolute:
+        y = extra_records_found
+    else:
+        y = extra_records_found / label_matrix.n_pos_docs[:, None]
+
+    return _curve_array(x), _curve_array(y)
+
+
+def _loss_matrix_values(label_matrix):
+    """Loss of all runs, see _loss_value for the computation."""
+    Ny = label_matrix.n_pos_docs.astype(np.int64)
+    Nx = label_matrix.n_docs
+
+    if ((Ny == 0) | (Ny == Nx)).any():
+        raise ValueError("Need both 0 and 1 labels")
+
+    return (Ny * (Nx - (Ny - 1) / 2) - label_matrix.tp.sum(axis=1)) / (Ny * (Nx - Ny))
+
+
+def _td_matrix_values(label_matrix):
+    """Time to discovery of each relevant record, with a run on each row.
+
+    The time to discovery is the number of records screened to find the
+    relevant record. The average time to discovery of the runs is the mean
+    over the rows.
+    """
+    return _curve_array(label_matrix.positions + 1)
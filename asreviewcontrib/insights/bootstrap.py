@@ -0,0 +1,316 @@
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import asreview
+import numpy as np
+
+from asreviewcontrib.insights.algorithms import _as_label_matrix
+from asreviewcontrib.insights.algorithms import _loss_matrix_values
+from asreviewcontrib.insights.algorithms import _td_matrix_values
+from asreviewcontrib.insights.metrics import _erf
+from asreviewcontrib.insights.metrics import _recall
+from asreviewcontrib.insights.metrics import _wss
+from asreviewcontrib.insights.metrics import get_metrics
+from asreviewcontrib.insights.utils import _n_workers
+from asreviewcontrib.insights.utils import map_files
+
+# Metrics of which the confidence intervals are computed, with their titles.
+BOOTSTRAP_METRICS = {
+    "recall": "Recall",
+    "wss": "Work Saved over Sampling",
+    "erf": "Extra Relevant record Found",
+    "loss": "Loss",
+    "atd": "Average Time to Discovery",
+}
+
+# Number of resamples drawn with the same seed. The resamples are drawn in
+# blocks, so the intervals do not depend on the number of jobs.
+_BLOCK_SIZE = 1000
+
+
+def _intercepts(value, default):
+    if value is None:
+        return default
+    return np.atleast_1d(value).astype(float).tolist()
+
+
+def _bootstrap_means(values, task):
+    """Means of the values over resampled runs, for a block of resamples.
+
+    The runs are resampled by drawing their indices, the values of all
+    resamples are then taken at once for each column.
+    """
+    n_resamples, seed = task
+    rng = np.random.default_rng(seed)
+
+    n_runs = values.shape[0]
+    indices = rng.integers(0, n_runs, size=(n_resamples, n_runs))
+
+    return np.stack([column[indices].mean(axis=1) for column in values.T], axis=1)
+
+
+def bootstrap_ci(values, n_resamples=1000, confidence=0.95, seed=None, n_jobs=1):
+    """Percentile bootstrap confidence interval of the mean over runs.
+
+    Parameters
+    ----------
+    values : array_like
+        Values of the runs, an array of shape (n_runs,) or (n_runs, n_values)
+        with the values of a run on each row, e.g. the recall of each run at
+        multiple intercepts.
+    n_resamples : int, optional
+        Number of bootstrap resamples, by default 1000.
+    confidence : float, optional
+        Confidence level of the interval, by default 0.95.
+    seed : int, optional
+        Seed of the random number generator, by default None.
+    n_jobs : int, optional
+        Number of processes to draw the resamples in. Use -1 to use all CPU
+        cores. By default 1. Only worth it for large numbers of resamples.
+
+    Returns
+    -------
+    tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        The mean over the runs and the lower and upper bound of the interval,
+        each of shape (n_values,), or scalars for 1-D values.
+    """
+    values = np.asarray(values, dtype=float)
+
+    if values.ndim not in (1, 2) or values.shape[0] == 0:
+        raise ValueError("Values should be a 1-D or 2-D array with a run on each row.")
+    if n_resamples < 1:
+        raise ValueError("The number of resamples should be at least 1.")
+    if not 0 < confidence < 1:
+        raise ValueError("The confidence should be between 0 and 1.")
+
+    # each block of resamples gets an independent stream of random numbers
+    block_sizes = [_BLOCK_SIZE] * (n_resamples // _BLOCK_SIZE)
+    if n_resamples % _BLOCK_SIZE:
+        block_sizes.append(n_resamples % _BLOCK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(block_sizes))
+
+    draw_means = functools.partial(_bootstrap_means, values.reshape(len(values), -1))
+    tasks = list(zip(block_sizes, seeds, strict=True))
+
+    n_workers = _n_workers(n_jobs, len(tasks))
+    if n_workers == 1:
+        means = np.concatenate(list(map(draw_means, tasks)))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            means = np.concatenate(list(pool.map(draw_means, tasks)))
+
+    alpha = (1 - confidence) / 2
+    lower, upper = np.quantile(means, [alpha, 1 - alpha], axis=0)
+
+    if values.ndim == 1:
+        return values.mean().item(), lower.item(), upper.item()
+    return values.mean(axis=0), lower, upper
+
+
+def _run_values_from_stats(all_stats):
+    """Collect the values of the metrics of each run from their stats.
+
+    Returns a dict with the intercepts (None for metrics with a single value)
+    and an array with the values of a run on each row for each metric.
+    """
+    run_values = {}
+    for stats in all_stats:
+        for item in stats["data"]["items"]:
+            if item["id"] not in BOOTSTRAP_METRICS:
+                continue
+
+            if isinstance(item["value"], list):
+                intercepts = [i for i, _ in item["value"]]
+                values = [v for _, v in item["value"]]
+            else:
+                intercepts, values = None, [item["value"]]
+
+            intercepts_runs, values_runs = run_values.setdefault(
+                item["id"], (intercepts, [])
+            )
+            if intercepts != intercepts_runs:
+                raise ValueError(
+                    f"All runs should have the same intercepts for '{item['id']}'."
+                )
+            values_runs.append(values)
+
+    return {
+        metric: (intercepts, np.array(values, dtype=float))
+        for metric, (intercepts, values) in run_values.items()
+    }
+
+
+def _run_values_from_labels(labels, recall, wss, erf, x_absolute, y_absolute):
+    """Compute the values of the metrics of all runs at once."""
+    label_matrix = _as_label_matrix(labels)
+    kwargs = {"x_absolute": x_absolute, "y_absolute": y_absolute}
+
+    return {
+        "recall": (recall, _recall(label_matrix, recall, **kwargs)),
+        "wss": (wss, _wss(label_matrix, wss, **kwargs)),
+        "erf": (erf, _erf(label_matrix, erf, **kwargs)),
+        "loss": (None, _loss_matrix_values(label_matrix)[:, None]),
+        "atd": (None, _td_matrix_values(label_matrix).mean(axis=1)[:, None]),
+    }
+
+
+def _bootstrap_stats(run_values, n_resamples, confidence, seed, n_jobs, version):
+    items = []
+    n_runs = 0
+    for metric, (intercepts, values) in run_values.items():
+        n_runs = values.shape[0]
+        mean, lower, upper = bootstrap_ci(
+            values,
+            n_resamples=n_resamples,
+            confidence=confidence,
+            seed=seed,
+            n_jobs=n_jobs,
+        )
+        ci = [
+            {"mean": m, "lower": lo, "upper": up}
+            for m, lo, up in zip(
+                mean.tolist(), lower.tolist(), upper.tolist(), strict=True
+            )
+        ]
+        items.append(
+            {
+                "id": metric,
+                "title": BOOTSTRAP_METRICS[metric],
+                "value": ci[0]
+                if intercepts is None
+                else list(zip(intercepts, ci, strict=True)),
+            }
+        )
+
+    return {
+        "asreviewVersion": asreview.__version__,
+        "apiVersion": version,
+        "nRuns": n_runs,
+        "nResamples": n_resamples,
+        "confidence": confidence,
+        "data": {"items": items},
+    }
+
+
+def bootstrap_metrics(
+    labels,
+    recall=None,
+    wss=None,
+    erf=None,
+    x_absolute=False,
+    y_absolute=False,
+    n_resamples=1000,
+    confidence=0.95,
+    seed=None,
+    n_jobs=1,
+    version=None,
+):
+    """Bootstrap confidence intervals of the metrics of multiple runs.
+
+    The metrics of all runs are computed at once on a label matrix, after
+    which the runs are resampled, see `bootstrap_ci`.
+
+    Parameters
+    ----------
+    labels : LabelMatrix | numpy.ndarray | list
+        The labels of the runs, a LabelMatrix, a 2-D array with a run on each
+        row or a list of label sets. All runs should have the same number of
+        records and relevant records.
+    recall, wss, erf : float | list[float], optional
+        Intercepts of the metrics, with the same defaults as `get_metrics`.
+    x_absolute, y_absolute : bool, optional
+        Use absolute coordinates on the axes, by default False.
+    n_resamples, confidence, seed, n_jobs
+        See `bootstrap_ci`.
+    version : str, optional
+        Version of asreview-insights, by default None.
+
+    Returns
+    -------
+    dict
+        The mean and the interval of each metric and intercept, in the same
+        layout as `get_metrics`.
+    """
+    run_values = _run_values_from_labels(
+        labels,
+        _intercepts(recall, [0.1, 0.25, 0.5, 0.75, 0.9]),
+        _intercepts(wss, [0.95]),
+        _intercepts(erf, [0.10]),
+        x_absolute,
+        y_absolute,
+    )
+
+    return _bootstrap_stats(run_values, n_resamples, confidence, seed, n_jobs, version)
+
+
+def get_bootstrap_metrics(
+    asreview_files,
+    recall=None,
+    wss=None,
+    erf=None,
+    priors=False,
+    x_absolute=False,
+    y_absolute=False,
+    n_resamples=1000,
+    confidence=0.95,
+    seed=None,
+    n_jobs=1,
+    version=None,
+    cache=None,
+):
+    """Bootstrap confidence intervals of the metrics of multiple files.
+
+    The metrics of each file are computed with `get_metrics`, after which the
+    files are resampled, see `bootstrap_ci`. The files can have a different
+    number of records.
+
+    Parameters
+    ----------
+    asreview_files : list[str | Path]
+        The asreview files of the runs, e.g. simulations with different seeds.
+    recall, wss, erf : float | list[float], optional
+        Intercepts of the metrics, see `get_metrics`.
+    priors, x_absolute, y_absolute : bool, optional
+        See `get_metrics`.
+    n_resamples, confidence, seed : optional
+        See `bootstrap_ci`.
+    n_jobs : int, optional
+        Number of processes to compute the metrics of the files and to draw
+        the resamples in, by default 1.
+    version : str, optional
+        Version of asreview-insights, by default None.
+    cache : asreviewcontrib.insights.cache.LabelCache, optional
+        Cache for the labeling results, by default None
+
+    Returns
+    -------
+    dict
+        The mean and the interval of each metric and intercept, in the same
+        layout as `get_metrics`.
+    """
+    compute_metrics = functools.partial(
+        get_metrics,
+        recall=recall,
+        wss=wss,
+        erf=erf,
+        priors=priors,
+        x_absolute=x_absolute,
+        y_absolute=y_absolute,
+        cache=cache,
+    )
+    all_stats = map_files(compute_metrics, asreview_files, n_jobs=n_jobs)
+
+    return _bootstrap_stats(
+        _run_values_from_stats(all_stats),
+        n_resamples,
+        confidence,
+        seed,
+        n_jobs,
+        version,
+    )
+
+
+def bootstrap_path(output):
+    """Path of the bootstrap intervals file next to an output file."""
+    return Path(output).with_name(Path(output).name + ".bootstrap.json")
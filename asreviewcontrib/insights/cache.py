@@ -0,0 +1,173 @@
+import hashlib
+import os
+import tempfile
+import warnings
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+from asreviewcontrib.insights.utils import SimulationResults
+
+# Default maximum size of the cache in bytes.
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+
+def _default_cache_dir():
+    if os.environ.get("ASREVIEW_INSIGHTS_CACHE_DIR"):
+        return Path(os.environ["ASREVIEW_INSIGHTS_CACHE_DIR"])
+
+    if os.environ.get("XDG_CACHE_HOME"):
+        return Path(os.environ["XDG_CACHE_HOME"], "asreview-insights")
+
+    return Path(Path.home(), ".cache", "asreview-insights")
+
+
+class LabelCache:
+    """On-disk cache of the labeling results of asreview files.
+
+    The results of an asreview file are stored as compact NumPy arrays. An
+    entry is identified by the path, the size and the modification time of the
+    file, so a modified file is read again. When the total size of the cache
+    exceeds `max_size`, the least recently used entries are removed.
+
+    Unzipped project folders are never cached, as they can change while a
+    review is in progress.
+
+    Parameters
+    ----------
+    cache_dir : str | Path, optional
+        Directory of the cache. By default, the directory in the environment
+        variable ASREVIEW_INSIGHTS_CACHE_DIR is used, or the
+        asreview-insights folder in the user cache directory.
+    max_size : int, optional
+        Maximum size of the cache in bytes. By default 512 MB.
+    """
+
+    def __init__(self, cache_dir=None, max_size=DEFAULT_MAX_SIZE):
+        self.cache_dir = Path(cache_dir) if cache_dir else _default_cache_dir()
+        self.max_size = max_size
+
+    def _entry_path(self, asreview_file, review_id=None):
+        asreview_file = Path(asreview_file).resolve()
+        if not asreview_file.is_file():
+            return None
+
+        stat = asreview_file.stat()
+        key = f"{asreview_file}\0{stat.st_size}\0{stat.st_mtime_ns}\0{review_id}"
+
+        return Path(self.cache_dir, hashlib.sha256(key.encode()).hexdigest() + ".npz")
+
+    def get(self, asreview_file, review_id=None):
+        """Get the cached results of an asreview file.
+
+        Returns
+        -------
+        SimulationResults | None
+            The cached results, or None if the file is not in the cache.
+        """
+        fp = self._entry_path(asreview_file, review_id)
+        if fp is None:
+            return None
+
+        try:
+            with np.load(fp) as data:
+                results = SimulationResults(
+                    n_records=int(data["n_records"]),
+                    record_ids=data["record_ids"].astype(np.int64),
+                    labels=data["labels"].astype(np.int64),
+                    is_prior=data["is_prior"],
+                )
+        except FileNotFoundError:
+            return None
+        except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+            # a truncated or corrupt entry is a cache miss, remove it so the
+            # file is read and stored again
+            try:
+                fp.unlink(missing_ok=True)
+            except OSError:
+                pass
+            return None
+
+        # mark the entry as recently used
+        try:
+            os.utime(fp)
+        except OSError:
+            pass
+
+        return results
+
+    def put(self, asreview_file, results, review_id=None):
+        """Store the results of an asreview file in the cache."""
+        fp = self._entry_path(asreview_file, review_id)
+        if fp is None:
+            return
+
+        record_ids = results.record_ids
+        if len(record_ids) == 0 or record_ids.max() <= np.iinfo(np.int32).max:
+            record_ids = record_ids.astype(np.int32)
+
+        # the cache is an optimization, a cache that cannot be written (e.g. a
+        # read-only home directory) should not stop reading the file
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._write_entry(fp, results, record_ids)
+        except OSError as err:
+            warnings.warn(
+                f"Could not store the labels in the cache {self.cache_dir}: {err}",
+                stacklevel=2,
+            )
+            return
+
+        self._evict()
+
+    def _write_entry(self, fp, results, record_ids):
+        # write to a temporary file first, concurrent readers never see a
+        # partially written entry
+        fd, fp_tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    n_records=np.int64(results.n_records),
+                    record_ids=record_ids,
+                    labels=results.labels.astype(np.uint8),
+                    is_prior=results.is_prior.astype(bool),
+                )
+            os.replace(fp_tmp, fp)
+        finally:
+            if os.path.exists(fp_tmp):
+                os.remove(fp_tmp)
+
+    def _evict(self):
+        entries = []
+        for fp in self.cache_dir.glob("*.npz"):
+            try:
+                stat = fp.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, fp))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, fp in sorted(entries):
+            if total_size <= self.max_size:
+                break
+
+            try:
+                fp.unlink()
+            except OSError:
+                pass
+            total_size -= size
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        try:
+            for fp in self.cache_dir.glob("*.npz"):
+                try:
+                    fp.unlink()
+                except FileNotFoundError:
+                    pass
+        except OSError as err:
+            warnings.warn(
+                f"Could not clear the cache {self.cache_dir}: {err}", stacklevel=2
+            )
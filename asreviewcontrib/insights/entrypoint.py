@@ -1,15 +1,168 @@
 import argparse
+import contextlib
+import csv
+import functools
 import json
+from pathlib import Path
 
-import matplotlib.pyplot as plt
-
-from asreviewcontrib.insights import plot_erf
-from asreviewcontrib.insights import plot_recall
-from asreviewcontrib.insights import plot_wss
+from asreviewcontrib.insights.bootstrap import _bootstrap_stats
+from asreviewcontrib.insights.bootstrap import _run_values_from_stats
+from asreviewcontrib.insights.bootstrap import bootstrap_path
+from asreviewcontrib.insights.cache import LabelCache
+from asreviewcontrib.insights.metrics import METRICS_TABLE_COLUMNS
+from asreviewcontrib.insights.metrics import TD_TABLE_COLUMNS
+from asreviewcontrib.insights.metrics import _is_up_to_date
 from asreviewcontrib.insights.metrics import get_metrics
 from asreviewcontrib.insights.metrics import print_metrics
+from asreviewcontrib.insights.metrics import read_metrics_lines
+from asreviewcontrib.insights.metrics import write_metrics_line
+from asreviewcontrib.insights.metrics import write_metrics_tables
+from asreviewcontrib.insights.timings import Timings
+from asreviewcontrib.insights.timings import _stage
+from asreviewcontrib.insights.timings import start_tracing
+from asreviewcontrib.insights.timings import timings_path
+from asreviewcontrib.insights.utils import map_files
+from asreviewcontrib.insights.watch import ReviewWatcher
+from asreviewcontrib.insights.watch import watch
+
+PLOT_TYPES = ["recall", "wss", "erf"]
+
+
+def _get_cache(args):
+    cache = LabelCache()
+    if args.clear_cache:
+        cache.clear()
+
+    return cache if args.cache else None
+
+
+def _get_timings(args):
+    if not args.timings:
+        return None
+
+    start_tracing()
+    return Timings()
+
+
+def _report_timings(timings, output=None):
+    print(timings.summary())
+
+    if output:
+        timings.write(timings_path(output))
+        print(f"Timings successfully saved to {timings_path(output)}")
+
+
+def _call_timed(func, asreview_file):
+    """Process a file and return the result and the timings of the stages."""
+    start_tracing()
+    timings = Timings()
+    result = func(asreview_file, timings=timings)
+
+    return result, timings.records
+
+
+def _parse_plot_types(value):
+    """Parse a comma-separated list of plot types, or "all"."""
+    plot_types = PLOT_TYPES if value == "all" else value.split(",")
+
+    for plot_type in plot_types:
+        if plot_type not in PLOT_TYPES:
+            raise argparse.ArgumentTypeError(
+                f"invalid plot type '{plot_type}' (choose from "
+                f"{', '.join(PLOT_TYPES)} or all)"
+            )
+
+    return plot_types
+
+
+def _resume_metrics(output, asreview_files, parameters):
+    """Split the files in files with up-to-date metrics and files to compute.
+
+    Returns the records in the output file to keep, and the files of which the
+    metrics still have to be computed. Records of files that are computed again
+    are dropped, records of files that are not in `asreview_files` are kept.
+    """
+    records = {record["file"]: record for record in read_metrics_lines(output)}
+
+    up_to_date = {
+        fp
+        for fp in asreview_files
+        if fp in records and _is_up_to_date(records[fp], parameters)
+    }
+    kept_records = [
+        record
+        for fp, record in records.items()
+        if fp in up_to_date or fp not in asreview_files
+    ]
+
+    return kept_records, [fp for fp in asreview_files if fp not in up_to_date]
+
+
+def _watch_metrics(args, parameters, version):
+    """Update the metrics of reviews in progress until interrupted."""
+    metric_kwargs = {k: v for k, v in parameters.items() if k != "priors"}
+    watchers = [ReviewWatcher(fp, priors=args.priors) for fp in args.asreview_files]
+    output_dict = {}
+
+    with contextlib.ExitStack() as stack:
+        # append, so a restarted watch keeps the history of the metrics
+        if args.format == "jsonl":
+            f_jsonl = stack.enter_context(open(args.output, "a"))
+
+        try:
+            for watcher in watch(watchers, interval=args.watch, n_polls=args.polls):
+                asreview_file = watcher.asreview_file
+                try:
+                    stats = watcher.get_metrics(**metric_kwargs, version=version)
+                except ValueError as err:
+                    print(f"Skipping {asreview_file}: {err}")
+                    continue
+
+                print(f"Updated metrics for {asreview_file}")
+                if args.format == "jsonl":
+                    write_metrics_line(f_jsonl, asreview_file, stats, parameters)
+                elif args.output:
+                    output_dict[asreview_file] = stats
+                    with open(args.output, "w") as f:
+                        json.dump(output_dict, f, indent=4)
+                if not args.quiet:
+                    print_metrics(stats)
+        except KeyboardInterrupt:
+            pass
+
 
-TYPE_TO_FUNC = {"recall": plot_recall, "wss": plot_wss, "erf": plot_erf}
+def _plot_per_file(args):
+    """Save a figure for each file, in parallel worker processes."""
+    from asreviewcontrib.insights.plot import save_file_figures
+
+    save_figures = functools.partial(
+        save_file_figures,
+        output=args.output,
+        plot_types=args.plot_types,
+        layout=args.layout,
+        priors=args.priors,
+        x_absolute=args.x_absolute,
+        y_absolute=args.y_absolute,
+        show_legend=False,
+        cache=_get_cache(args),
+        decimate=args.decimate,
+    )
+    timings = _get_timings(args)
+    if timings is not None:
+        save_figures = functools.partial(_call_timed, save_figures)
+
+    n_files = len(args.asreview_files)
+    all_outputs = map_files(save_figures, args.asreview_files, n_jobs=args.jobs)
+    for i, (asreview_file, outputs) in enumerate(
+        zip(args.asreview_files, all_outputs, strict=True), start=1
+    ):
+        if timings is not None:
+            outputs, records = outputs
+            timings.records.extend(records)
+        print(f"Saved {', '.join(outputs)} for {asreview_file} ({i}/{n_files})")
+
+    if timings is not None:
+        _report_timings(timings)
 
 
 class PlotEntryPoint:
@@ -22,11 +175,13 @@ class PlotEntryPoint:
     def execute(self, argv):
         parser = argparse.ArgumentParser(prog="asreview plot")
         parser.add_argument(
-            "plot_type",
+            "plot_types",
             metavar="type",
-            type=str,
+            type=_parse_plot_types,
             default="recall",
-            help="Plot type. Default 'recall'.",
+            help="Plot type: recall, wss or erf. Use a comma-separated list (e.g. "
+            "recall,wss) or 'all' for multiple plot types. The files are loaded "
+            "once for all plot types.",
         )
         parser.add_argument(
             "asreview_files",
@@ -71,24 +226,134 @@ class PlotEntryPoint:
             " by the matplotlib library, check there to see available "
             "formats.",
         )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=1,
+            help="Number of files to load in parallel. Use -1 to use all CPU "
+            "cores. Default 1.",
+        )
+        parser.add_argument(
+            "--no-cache",
+            dest="cache",
+            action="store_false",
+            help="Do not read or store the labels of the files in the label cache.",
+        )
+        parser.add_argument(
+            "--clear-cache",
+            action="store_true",
+            help="Remove all files from the label cache before plotting.",
+        )
+        parser.add_argument(
+            "--aggregate",
+            nargs="?",
+            const="mean",
+            default=False,
+            choices=["mean", "median"],
+            help="Plot the mean (default) or median over all files with a band "
+            "between the 5% and 95% quantiles, instead of a curve for each file. "
+            "The files should have the same number of records.",
+        )
+        parser.add_argument(
+            "--decimate",
+            action="store_true",
+            help="Reduce the curves to a few points per pixel. Faster for very "
+            "long reviews, but only exact up to the width of a pixel.",
+        )
+        parser.add_argument(
+            "--layout",
+            choices=["subplots", "separate"],
+            default="subplots",
+            help="For multiple plot types, plot them side by side in a single "
+            "figure (subplots, default), or in a figure for each plot type "
+            "(separate). Separate figures are saved with the plot type added to "
+            "the name of the output file, e.g. plot_recall.png for plot.png.",
+        )
+        parser.add_argument(
+            "--timings",
+            "--profile",
+            action="store_true",
+            help="Print the wall time and peak memory of each stage "
+            "(load, plot, save) of each file. With --jobs, the files are loaded "
+            "in parallel threads and measured as a single load stage. With an "
+            "output file, the timings are also saved to <output>.timings.json.",
+        )
+        parser.add_argument(
+            "--per-file",
+            action="store_true",
+            help="Save a figure for each file instead of a single figure for all "
+            "files. The output (-o) is a template of the path of the figures, with "
+            "the fields {stem} (the name of the file without extension) and "
+            "{type} (the plot type), e.g. 'figures/{stem}_{type}.png'. The "
+            "figures are rendered without a display, with --jobs processes.",
+        )
         args = parser.parse_args(argv)
 
-        fig, ax = plt.subplots()
-        plot_func = TYPE_TO_FUNC[args.plot_type]
+        if not (args.jobs >= 1 or args.jobs == -1):
+            parser.error("--jobs should be a positive integer or -1.")
+        if args.per_file:
+            if args.output is None or "{stem}" not in args.output:
+                parser.error("--per-file requires an output template with {stem}.")
+            try:
+                args.output.format(stem="", type="")
+            except (KeyError, IndexError, ValueError):
+                parser.error(
+                    "The output template can only have the fields {stem} and {type}."
+                )
+            if args.aggregate:
+                parser.error("--per-file cannot be combined with --aggregate.")
+
+            _plot_per_file(args)
+            return
+
+        # matplotlib is only imported when plotting
+        import matplotlib.pyplot as plt
+
+        from asreviewcontrib.insights import plot
+
+        cache = _get_cache(args)
+        timings = _get_timings(args)
+
+        n_types = len(args.plot_types)
+        if args.layout == "separate" and n_types > 1:
+            figs, axes = zip(*(plt.subplots() for _ in args.plot_types), strict=True)
+            outputs = [
+                plot._plot_output_path(args.output, plot_type) if args.output else None
+                for plot_type in args.plot_types
+            ]
+        else:
+            width, height = plt.rcParams["figure.figsize"]
+            fig, axes = plt.subplots(
+                1, n_types, figsize=(width * n_types, height), squeeze=False
+            )
+            figs, axes, outputs = [fig], list(axes[0]), [args.output]
+
         show_legend = False if len(args.asreview_files) == 1 else True
-        plot_func(
-            ax,
+        plot.plot_multiple(
+            axes,
             args.asreview_files,
+            plot_types=args.plot_types,
             priors=args.priors,
             x_absolute=args.x_absolute,
             y_absolute=args.y_absolute,
             show_legend=show_legend,
+            n_jobs=args.jobs,
+            cache=cache,
+            aggregate=args.aggregate,
+            decimate=args.decimate,
+            timings=timings,
         )
 
-        if args.output:
-            fig.savefig(args.output)
-        else:
-            plt.show()
+        with _stage(timings, "save"):
+            if args.output:
+                for fig, output in zip(figs, outputs, strict=True):
+                    fig.savefig(output)
+            else:
+                plt.show()
+
+        if timings is not None:
+            _report_timings(timings, args.output)
 
 
 class MetricsEntryPoint:
@@ -171,36 +436,232 @@ class MetricsEntryPoint:
             "-o",
             "--output",
             default=None,
-            help="Save the metrics and results to a JSON file.",
+            help="Save the metrics and results to a JSON file. If the file name "
+            "ends with .jsonl, the JSON Lines format is used.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["json", "jsonl"],
+            default=None,
+            help="Format of the output file. With 'jsonl', each file is written "
+            "as a single line as soon as its metrics are computed. By default, "
+            "the format is derived from the extension of the output file.",
+        )
+        parser.add_argument(
+            "--csv",
+            metavar="DIRECTORY",
+            default=None,
+            help="Save the metrics as tables to metrics.csv (file, metric, "
+            "intercept, value) and td.csv (file, record_id, time_to_discovery) in "
+            "the given directory.",
         )
         parser.add_argument(
             "--quiet", action="store_true", help="Suppress printed output of metrics."
         )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=1,
+            help="Number of files to compute the metrics for in parallel. Use -1 "
+            "to use all CPU cores. Default 1.",
+        )
+        parser.add_argument(
+            "--no-cache",
+            dest="cache",
+            action="store_false",
+            help="Do not read or store the labels of the files in the label cache.",
+        )
+        parser.add_argument(
+            "--clear-cache",
+            action="store_true",
+            help="Remove all files from the label cache before computing the metrics.",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Skip the files that already have metrics in the JSON Lines "
+            "output file, computed with the same parameters for the same version "
+            "of the file. Only new or modified files are computed.",
+        )
+        parser.add_argument(
+            "--timings",
+            "--profile",
+            action="store_true",
+            help="Print the wall time and peak memory of each stage "
+            "(load, compute, output) of each file. With an output file, they are also "
+            "saved to <output>.timings.json.",
+        )
+        parser.add_argument(
+            "--bootstrap",
+            metavar="N_RESAMPLES",
+            type=int,
+            default=None,
+            help="Compute bootstrap confidence intervals of the mean recall, wss, "
+            "erf, loss and average time to discovery over all files, with the "
+            "given number of resamples. With an output file, they are also saved "
+            "to <output>.bootstrap.json.",
+        )
+        parser.add_argument(
+            "--confidence",
+            type=float,
+            default=0.95,
+            help="Confidence level of the bootstrap intervals. Default 0.95.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=None,
+            help="Seed of the bootstrap resamples.",
+        )
+        parser.add_argument(
+            "--watch",
+            metavar="SECONDS",
+            type=float,
+            nargs="?",
+            const=60,
+            default=None,
+            help="Watch reviews in progress: poll the files every 60 seconds "
+            "(or the given number of seconds) and update the metrics of the files "
+            "with new labels. Only the new rows of the results are read. Use on "
+            "unzipped project folders, .asreview files are read again when "
+            "modified. Stop with Ctrl+C.",
+        )
+        parser.add_argument(
+            "--polls",
+            type=int,
+            default=None,
+            help="Stop watching after the given number of polls.",
+        )
         args = parser.parse_args(argv)
 
-        output_dict = {}
-        for asreview_file in args.asreview_files:
-            if len(args.asreview_files) > 1:
-                print(f"Calculating metrics for {asreview_file}")
-            stats = get_metrics(
-                asreview_file,
-                recall=args.recall,
-                wss=args.wss,
-                erf=args.erf,
-                cm=args.cm,
-                priors=args.priors,
-                x_absolute=args.x_absolute,
-                y_absolute=args.y_absolute,
-                version=self.version,
+        if args.format is None:
+            is_jsonl = args.output is not None and Path(args.output).suffix == ".jsonl"
+            args.format = "jsonl" if is_jsonl else "json"
+        if args.format == "jsonl" and args.output is None:
+            parser.error("--format jsonl requires an output file (-o).")
+        if args.resume and args.format != "jsonl":
+            parser.error("--resume requires a JSON Lines output file (-o).")
+        if not (args.jobs >= 1 or args.jobs == -1):
+            parser.error("--jobs should be a positive integer or -1.")
+        if args.bootstrap is not None and args.bootstrap < 1:
+            parser.error("--bootstrap requires at least 1 resample.")
+        if not 0 < args.confidence < 1:
+            parser.error("--confidence should be between 0 and 1.")
+        if args.watch is not None and (args.resume or args.csv or args.bootstrap):
+            parser.error(
+                "--watch cannot be combined with --resume, --csv or --bootstrap."
             )
-            output_dict[asreview_file] = stats
-            if not args.quiet:
-                print_metrics(stats)
 
-        if args.output:
+        parameters = {
+            "recall": args.recall,
+            "wss": args.wss,
+            "erf": args.erf,
+            "cm": args.cm,
+            "priors": args.priors,
+            "x_absolute": args.x_absolute,
+            "y_absolute": args.y_absolute,
+        }
+
+        if args.watch is not None:
+            _watch_metrics(args, parameters, self.version)
+            return
+
+        asreview_files = args.asreview_files
+        kept_records = []
+        if args.resume:
+            kept_records, asreview_files = _resume_metrics(
+                args.output, asreview_files, parameters
+            )
+            n_skipped = len(args.asreview_files) - len(asreview_files)
+            print(f"Skipping {n_skipped} files with up-to-date metrics")
+
+        compute_metrics = functools.partial(
+            get_metrics,
+            **parameters,
+            version=self.version,
+            cache=_get_cache(args),
+        )
+        timings = _get_timings(args)
+        if timings is not None:
+            compute_metrics = functools.partial(_call_timed, compute_metrics)
+        all_stats = map_files(compute_metrics, asreview_files, n_jobs=args.jobs)
+
+        n_files = len(asreview_files)
+        output_dict = {}
+        bootstrap_runs = list(kept_records)
+        with contextlib.ExitStack() as stack:
+            # JSON Lines are written as soon as the metrics of a file are
+            # available, so the stats do not have to be kept in memory
+            if args.format == "jsonl":
+                f_jsonl = stack.enter_context(open(args.output, "w"))
+                for record in kept_records:
+                    f_jsonl.write(json.dumps(record) + "\n")
+                f_jsonl.flush()
+
+            if args.csv:
+                Path(args.csv).mkdir(parents=True, exist_ok=True)
+                f_metrics = stack.enter_context(
+                    open(Path(args.csv, "metrics.csv"), "w", newline="")
+                )
+                f_td = stack.enter_context(
+                    open(Path(args.csv, "td.csv"), "w", newline="")
+                )
+                csv.writer(f_metrics).writerow(METRICS_TABLE_COLUMNS)
+                csv.writer(f_td).writerow(TD_TABLE_COLUMNS)
+                for record in kept_records:
+                    write_metrics_tables(f_metrics, f_td, record["file"], record)
+
+            for i, (asreview_file, stats) in enumerate(
+                zip(asreview_files, all_stats, strict=True), start=1
+            ):
+                if timings is not None:
+                    stats, records = stats
+                    timings.records.extend(records)
+                if n_files > 1:
+                    print(f"Calculated metrics for {asreview_file} ({i}/{n_files})")
+                if args.bootstrap:
+                    bootstrap_runs.append(stats)
+
+                with _stage(timings, "output", asreview_file):
+                    if args.format == "jsonl":
+                        write_metrics_line(f_jsonl, asreview_file, stats, parameters)
+                    else:
+                        output_dict[asreview_file] = stats
+                    if args.csv:
+                        write_metrics_tables(f_metrics, f_td, asreview_file, stats)
+                    if not args.quiet:
+                        print_metrics(stats)
+
+        if args.output and args.format == "json":
             if len(args.asreview_files) == 1:
                 output_dict = output_dict[args.asreview_files[0]]
-            with open(args.output, "w") as f:
+            with _stage(timings, "output"), open(args.output, "w") as f:
                 json.dump(output_dict, f, indent=4)
-            if args.quiet:
-                print(f"Metrics successfully saved to {args.output}")
+        if args.output and args.quiet:
+            print(f"Metrics successfully saved to {args.output}")
+        if args.csv and args.quiet:
+            print(f"Metrics tables successfully saved to {args.csv}")
+
+        if args.bootstrap:
+            with _stage(timings, "bootstrap"):
+                bootstrap_stats = _bootstrap_stats(
+                    _run_values_from_stats(bootstrap_runs),
+                    n_resamples=args.bootstrap,
+                    confidence=args.confidence,
+                    seed=args.seed,
+                    n_jobs=args.jobs,
+                    version=self.version,
+                )
+            if not args.quiet:
+                print_metrics(bootstrap_stats)
+            if args.output:
+                with open(bootstrap_path(args.output), "w") as f:
+                    json.dump(bootstrap_stats, f, indent=4)
+                print(
+                    "Bootstrap intervals successfully saved to "
+                    f"{bootstrap_path(args.output)}"
+                )
+
+        if timings is not None:
+            _report_timings(timings, args.output)
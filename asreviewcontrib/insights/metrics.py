@@ -1,17 +1,29 @@
+import csv
 import json
+from pathlib import Path
 
 import asreview
 import numpy as np
 
-from asreviewcontrib.insights.algorithms import _erf_values
+from asreviewcontrib.insights.algorithms import LabelMatrix
+from asreviewcontrib.insights.algorithms import LabelSet
+from asreviewcontrib.insights.algorithms import _as_label_set
+from asreviewcontrib.insights.algorithms import _erf_at
+from asreviewcontrib.insights.algorithms import _erf_matrix_values
 from asreviewcontrib.insights.algorithms import _fn_values
 from asreviewcontrib.insights.algorithms import _fp_values
 from asreviewcontrib.insights.algorithms import _loss_value
-from asreviewcontrib.insights.algorithms import _recall_values
+from asreviewcontrib.insights.algorithms import _recall_at
+from asreviewcontrib.insights.algorithms import _recall_matrix_values
 from asreviewcontrib.insights.algorithms import _tn_values
 from asreviewcontrib.insights.algorithms import _tp_values
+from asreviewcontrib.insights.algorithms import _wss_matrix_values
 from asreviewcontrib.insights.algorithms import _wss_values
+from asreviewcontrib.insights.timings import _stage
+from asreviewcontrib.insights.utils import _labeled_records
+from asreviewcontrib.insights.utils import _simulation_positions
 from asreviewcontrib.insights.utils import get_simulation_labels
+from asreviewcontrib.insights.utils import read_simulation_results
 
 
 def _slice_metric(x, y, intercept):
@@ -24,19 +36,46 @@ def _slice_metric(x, y, intercept):
     x: numpy.array or list
         The values of the x-axis.
     y: numpy.array or list
-        The values of the y-axis.
-    intercept: float
-        The value of the x-axis to map to the y-axis. If value
+        The values of the y-axis. For a 2-D array, each row is sliced.
+    intercept: float | list[float] | numpy.array
+        The value(s) of the x-axis to map to the y-axis. If value
         is not present, the first value greater than the intercept
-        is used.
+        is used. Multiple intercepts are evaluated with a single
+        binary search over the curve.
 
     Returns
     -------
-    float
+    float | numpy.array
+        A single value if the intercept is a scalar, otherwise an array
+        with a value for each intercept.
     """
 
     i = np.searchsorted(x, intercept, side="right")
-    return y[i - 1]
+    values = np.asarray(y)[..., i - 1]
+
+    if np.ndim(values) == 0:
+        return values.item()
+    return values
+
+
+def _zero_before_start(x_start, intercept, values):
+    """Set the values of intercepts before the first value of x to 0."""
+
+    if np.ndim(values) == 0:
+        return 0 if intercept < x_start else values
+    return np.where(np.asarray(intercept) < x_start, 0, values)
+
+
+def _scalar_or_array(values):
+    values = np.asarray(values)
+
+    if values.ndim == 0:
+        return values.item()
+    return values
+
+
+def _x_start(n_docs, x_absolute=False):
+    return 1 if x_absolute else 1 / n_docs
 
 
 def recall(asreview_file, intercept, priors=False, x_absolute=False, y_absolute=False):
@@ -46,12 +85,19 @@ def recall(asreview_file, intercept, priors=False, x_absolute=False, y_absolute=
 
 
 def _recall(labels, intercept, x_absolute=False, y_absolute=False):
-    x, y = _recall_values(labels, x_absolute=x_absolute, y_absolute=y_absolute)
+    if isinstance(labels, LabelMatrix):
+        x, y = _recall_matrix_values(
+            labels, x_absolute=x_absolute, y_absolute=y_absolute
+        )
+        return _zero_before_start(x[0], intercept, _slice_metric(x, y, intercept))
 
-    if intercept < x[0]:
-        return 0
+    # evaluate the recall at the intercepts only, without the full curve
+    labels = _as_label_set(labels)
+    values = _recall_at(labels, intercept, x_absolute=x_absolute, y_absolute=y_absolute)
 
-    return _slice_metric(x, y, intercept)
+    return _zero_before_start(
+        _x_start(labels.n_docs, x_absolute), intercept, _scalar_or_array(values)
+    )
 
 
 def wss(asreview_file, intercept, priors=False, x_absolute=False, y_absolute=False):
@@ -61,7 +107,11 @@ def wss(asreview_file, intercept, priors=False, x_absolute=False, y_absolute=Fal
 
 
 def _wss(labels, intercept, x_absolute=False, y_absolute=False):
-    x, y = _wss_values(labels, x_absolute=x_absolute, y_absolute=y_absolute)
+    if isinstance(labels, LabelMatrix):
+        values_func = _wss_matrix_values
+    else:
+        values_func = _wss_values
+    x, y = values_func(labels, x_absolute=x_absolute, y_absolute=y_absolute)
 
     return _slice_metric(x, y, intercept)
 
@@ -73,35 +123,37 @@ def erf(asreview_file, intercept, priors=False, x_absolute=False, y_absolute=Fal
 
 
 def _erf(labels, intercept, x_absolute=False, y_absolute=False):
-    x, y = _erf_values(labels, x_absolute=x_absolute, y_absolute=y_absolute)
+    if isinstance(labels, LabelMatrix):
+        x, y = _erf_matrix_values(labels, x_absolute=x_absolute, y_absolute=y_absolute)
+        return _slice_metric(x, y, intercept)
 
-    return _slice_metric(x, y, intercept)
+    # evaluate the ERF at the intercepts only, without the full curve
+    values = _erf_at(
+        _as_label_set(labels), intercept, x_absolute=x_absolute, y_absolute=y_absolute
+    )
 
+    return _scalar_or_array(values)
 
-def time_to_discovery(asreview_file, priors=False):
-    with asreview.open_state(asreview_file) as state_obj:
-        data = state_obj.get_results_table(
-            columns=["record_id", "label"], priors=priors
-        )
 
-    return _time_to_discovery(data["record_id"], data["label"])
+def time_to_discovery(asreview_file, priors=False, cache=None):
+    results = read_simulation_results(asreview_file, cache=cache)
+
+    return _time_to_discovery(*_labeled_records(results, priors=priors))
 
 
 def _time_to_discovery(record_ids, labels):
-    labels = np.array(labels)
-    record_ids = np.array(record_ids)
+    labels = np.asarray(labels)
+    record_ids = np.asarray(record_ids)
 
     v_rel = record_ids[labels == 1]
-    i_rel = np.arange(len(labels))[labels == 1] + 1
+    i_rel = np.flatnonzero(labels == 1) + 1
 
     return list(zip(v_rel.tolist(), i_rel.tolist(), strict=True))
 
 
 def average_time_to_discovery(asreview_file, priors=False):
-    with asreview.open_state(asreview_file) as state_obj:
-        data = state_obj.get_dataset(["record_id", "label"], priors=priors)
+    td = time_to_discovery(asreview_file, priors=priors)
 
-    td = _time_to_discovery(data["record_id"], data["label"])
     return _average_time_to_discovery(td)
 
 
@@ -164,15 +216,14 @@ def tnr(asreview_file, intercept, priors=False, x_absolute=False):
 
 
 def _tnr(labels, intercept, x_absolute=False):
-    n_excludes = labels.count(0)
+    labels = _as_label_set(labels)
     x, y = _tn_values(labels, x_absolute=x_absolute)
-    y = [v / n_excludes for v in y]
-    y = np.round(y, 6)
+    tnr = np.round(np.divide(_slice_metric(x, y, intercept), labels.n_neg_docs), 6)
 
-    if intercept < x[0]:
-        return 0
+    if np.ndim(intercept) == 0:
+        tnr = tnr.item()
 
-    return _slice_metric(x, y, intercept)
+    return _zero_before_start(x[0], intercept, tnr)
 
 
 def loss(asreview_file, priors=False):
@@ -201,7 +252,44 @@ def get_metrics(
     x_absolute=False,
     y_absolute=False,
     version=None,
+    cache=None,
+    timings=None,
+):
+    # read the file once, both the labels and the time to discovery are derived
+    # from the same results
+    with _stage(timings, "load", asreview_file):
+        results = read_simulation_results(asreview_file, cache=cache)
+
+    with _stage(timings, "compute", asreview_file):
+        labels = LabelSet.from_positions(*_simulation_positions(results, priors))
+        td = _time_to_discovery(*_labeled_records(results, priors=priors))
+
+        return _metrics_from_labels(
+            labels,
+            td,
+            recall=recall,
+            wss=wss,
+            erf=erf,
+            cm=cm,
+            x_absolute=x_absolute,
+            y_absolute=y_absolute,
+            version=version,
+        )
+
+
+def _metrics_from_labels(
+    labels,
+    td,
+    recall=None,
+    wss=None,
+    erf=None,
+    cm=None,
+    x_absolute=False,
+    y_absolute=False,
+    version=None,
 ):
+    """Compute the metrics of get_metrics from a label set and the TD."""
+
     def ensure_list_of_floats(value, default):
         if value is None:
             return default
@@ -218,24 +306,22 @@ def get_metrics(
     erf = ensure_list_of_floats(erf, [0.10])
     cm = ensure_list_of_floats(cm, [0.1, 0.25, 0.5, 0.75, 0.9])
 
-    labels = get_simulation_labels(asreview_file, priors=priors)
-
-    td = time_to_discovery(asreview_file)
-
-    recall_values = [
-        _recall(labels, v, x_absolute=x_absolute, y_absolute=y_absolute) for v in recall
-    ]
-    wss_values = [
-        _wss(labels, v, x_absolute=x_absolute, y_absolute=y_absolute) for v in wss
-    ]
-    erf_values = [
-        _erf(labels, v, x_absolute=x_absolute, y_absolute=y_absolute) for v in erf
-    ]
-    tp_values = [_tp(labels, v, x_absolute=False) for v in cm]
-    fp_values = [_fp(labels, v, x_absolute=False) for v in cm]
-    tn_values = [_tn(labels, v, x_absolute=False) for v in cm]
-    fn_values = [_fn(labels, v, x_absolute=False) for v in cm]
-    tnr_values = [_tnr(labels, v, x_absolute=x_absolute) for v in cm]
+    recall_values = _recall(
+        labels, recall, x_absolute=x_absolute, y_absolute=y_absolute
+    ).tolist()
+    wss_values = _wss(
+        labels, wss, x_absolute=x_absolute, y_absolute=y_absolute
+    ).tolist()
+    erf_values = _erf(
+        labels, erf, x_absolute=x_absolute, y_absolute=y_absolute
+    ).tolist()
+    tp_values = _tp(labels, cm, x_absolute=False).tolist()
+    fp_values = _fp(labels, cm, x_absolute=False).tolist()
+    tn_values = _tn(labels, cm, x_absolute=False).tolist()
+    fn_values = _fn(labels, cm, x_absolute=False).tolist()
+    tnr_values = _tnr(labels, cm, x_absolute=x_absolute).tolist()
+    loss_value = _loss_value(labels)
+    atd_value = _average_time_to_discovery(td)
 
     # based on https://google.github.io/styleguide/jsoncstyleguide.xml
     result = {
@@ -258,7 +344,7 @@ def get_metrics(
                 {
                     "id": "loss",
                     "title": "Loss",
-                    "value": _loss_value(labels),
+                    "value": loss_value,
                 },
                 {
                     "id": "erf",
@@ -268,7 +354,7 @@ def get_metrics(
                 {
                     "id": "atd",
                     "title": "Average Time to Discovery",
-                    "value": _average_time_to_discovery(td),
+                    "value": atd_value,
                 },
                 {"id": "td", "title": "Time to discovery", "value": td},
                 {
@@ -305,3 +391,127 @@ def get_metrics(
 
 def print_metrics(stats):
     print(json.dumps(stats, indent=4))
+
+
+# Columns of the tables written by write_metrics_tables.
+METRICS_TABLE_COLUMNS = ["file", "metric", "intercept", "value"]
+TD_TABLE_COLUMNS = ["file", "record_id", "time_to_discovery"]
+
+
+def _metrics_rows(asreview_file, stats):
+    """Flatten the metrics of a file into the rows of the metrics and TD table.
+
+    Metrics with a single value, like the loss, have no intercept.
+    """
+    metric_rows = []
+    td_rows = []
+    for item in stats["data"]["items"]:
+        if item["id"] == "td":
+            td_rows.extend((str(asreview_file), i, v) for i, v in item["value"])
+        elif isinstance(item["value"], list):
+            metric_rows.extend(
+                (str(asreview_file), item["id"], i, v) for i, v in item["value"]
+            )
+        else:
+            metric_rows.append((str(asreview_file), item["id"], None, item["value"]))
+
+    return metric_rows, td_rows
+
+
+def write_metrics_tables(f_metrics, f_td, asreview_file, stats):
+    """Append the metrics of a file to the metrics and TD table.
+
+    The metrics table has a row for each metric and intercept, with the
+    columns in METRICS_TABLE_COLUMNS. The time to discovery table has a row
+    for each relevant record, with the columns in TD_TABLE_COLUMNS. The header
+    is written by the caller.
+
+    Parameters
+    ----------
+    f_metrics : file object
+        CSV file for the metrics table, opened for writing text.
+    f_td : file object
+        CSV file for the time to discovery table, opened for writing text.
+    asreview_file : str | Path
+        Path to the asreview file of the metrics.
+    stats : dict
+        The metrics of the file, as returned by `get_metrics`.
+    """
+    metric_rows, td_rows = _metrics_rows(asreview_file, stats)
+
+    csv.writer(f_metrics).writerows(metric_rows)
+    csv.writer(f_td).writerows(td_rows)
+
+
+def write_metrics_line(f, asreview_file, stats, parameters=None):
+    """Write the metrics of a file as a single line of JSON.
+
+    The line is flushed directly, so the lines of the processed files are
+    available when the computation of the other files is interrupted. Next to
+    the metrics, the line holds the path and the modification time of the file
+    and the parameters of the metrics, to detect if the metrics are outdated.
+
+    Parameters
+    ----------
+    f : file object
+        File opened for writing text.
+    asreview_file : str | Path
+        Path to the asreview file of the metrics.
+    stats : dict
+        The metrics of the file, as returned by `get_metrics`.
+    parameters : dict, optional
+        The parameters used to compute the metrics, by default None
+    """
+    record = {
+        "file": str(asreview_file),
+        "fileModified": Path(asreview_file).stat().st_mtime_ns,
+        "parameters": parameters,
+        **stats,
+    }
+    f.write(json.dumps(record) + "\n")
+    f.flush()
+
+
+def read_metrics_lines(fp):
+    """Read the metrics from a JSON Lines file.
+
+    Lines that are not valid JSON, like a line that was partially written when
+    the computation was interrupted, are skipped.
+
+    Parameters
+    ----------
+    fp : str | Path
+        Path to the JSON Lines file. If the file does not exist, no metrics are
+        read.
+
+    Yields
+    ------
+    dict
+        The record of a single file, as written by `write_metrics_line`.
+    """
+    try:
+        f = open(fp)
+    except FileNotFoundError:
+        return
+
+    with f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict) and "file" in record:
+                yield record
+
+
+def _is_up_to_date(record, parameters=None):
+    """Check if a record holds the metrics of the current version of the file."""
+    try:
+        modified = Path(record["file"]).stat().st_mtime_ns
+    except OSError:
+        return False
+
+    return (
+        record.get("fileModified") == modified
+        and record.get("parameters") == parameters
+    )
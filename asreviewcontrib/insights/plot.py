@@ -2,10 +2,20 @@ from pathlib import Path
 
 import numpy as np
 
+from asreviewcontrib.insights.algorithms import LabelMatrix
+from asreviewcontrib.insights.algorithms import _as_label_matrix
+from asreviewcontrib.insights.algorithms import _as_label_sets
+from asreviewcontrib.insights.algorithms import _erf_matrix_values
 from asreviewcontrib.insights.algorithms import _erf_values
+from asreviewcontrib.insights.algorithms import _is_multiple
+from asreviewcontrib.insights.algorithms import _recall_matrix_values
 from asreviewcontrib.insights.algorithms import _recall_values
+from asreviewcontrib.insights.algorithms import _wss_matrix_values
 from asreviewcontrib.insights.algorithms import _wss_values
+from asreviewcontrib.insights.timings import _stage
+from asreviewcontrib.insights.utils import _n_workers
 from asreviewcontrib.insights.utils import get_simulation_labels
+from asreviewcontrib.insights.utils import map_files
 
 
 def plot_recall(
@@ -19,6 +29,12 @@ def plot_recall(
     show_legend=True,
     legend_values=None,
     legend_kwargs=None,
+    n_jobs=1,
+    cache=None,
+    aggregate=False,
+    quantiles=(0.05, 0.95),
+    decimate=False,
+    timings=None,
 ):
     """Plot the recall@T for all thresholds T.
 
@@ -48,6 +64,24 @@ def plot_recall(
         Dictionary of keyword arguments that are passed to the legend. See
         https://matplotlib.org/stable/api/_as_gen/matplotlib.pyplot.legend.html
         for the options.
+    n_jobs: int
+        Number of asreview files to load in parallel. Use -1 to use all CPU
+        cores. Default 1.
+    cache: asreviewcontrib.insights.cache.LabelCache | None
+        Cache for the labels of the asreview files. Default None.
+    aggregate: bool | str
+        If "mean" or "median" (or True for "mean"), plot the mean or median
+        over all asreview files as a single curve with a band between the
+        `quantiles`, instead of a curve for each file. The files should have
+        the same number of records. Default False.
+    quantiles: tuple[float, float]
+        Lower and upper quantile of the band if `aggregate` is set.
+    decimate: bool
+        If True, reduce the curves to a few points per pixel of the axes.
+        This is faster for very long reviews, but the curves can differ from
+        the exact curves within the width of a pixel. Default False.
+    timings: asreviewcontrib.insights.timings.Timings | None
+        Record the time of loading each file and of plotting. Default None.
     Returns
     -------
     matplotlib.axes.Axes
@@ -59,23 +93,27 @@ def plot_recall(
     """
     if not isinstance(asreview_files, list):
         asreview_files = [asreview_files]
-    labels = []
-    for asreview_file in asreview_files:
-        labels.append(get_simulation_labels(asreview_file=asreview_file, priors=priors))
+    labels = _get_labels(
+        asreview_files, priors=priors, n_jobs=n_jobs, cache=cache, timings=timings
+    )
     if show_legend and legend_values is None:
         legend_values = [Path(fp).stem for fp in asreview_files]
 
-    return _plot_recall(
-        ax,
-        labels,
-        x_absolute=x_absolute,
-        y_absolute=y_absolute,
-        show_random=show_random,
-        show_optimal=show_optimal,
-        show_legend=show_legend,
-        legend_values=legend_values,
-        legend_kwargs=legend_kwargs,
-    )
+    with _stage(timings, "plot"):
+        return _plot_recall(
+            ax,
+            labels,
+            x_absolute=x_absolute,
+            y_absolute=y_absolute,
+            show_random=show_random,
+            show_optimal=show_optimal,
+            show_legend=show_legend,
+            legend_values=legend_values,
+            legend_kwargs=legend_kwargs,
+            aggregate=aggregate,
+            quantiles=quantiles,
+            decimate=decimate,
+        )
 
 
 def plot_wss(
@@ -87,6 +125,12 @@ def plot_wss(
     show_legend=True,
     legend_values=None,
     legend_kwargs=None,
+    n_jobs=1,
+    cache=None,
+    aggregate=False,
+    quantiles=(0.05, 0.95),
+    decimate=False,
+    timings=None,
 ):
     """Plot the WSS@T for all thresholds T.
 
@@ -112,6 +156,24 @@ def plot_wss(
         Dictionary of keyword arguments that are passed to the legend. See
         https://matplotlib.org/stable/api/_as_gen/matplotlib.pyplot.legend.html
         for the options.
+    n_jobs: int
+        Number of asreview files to load in parallel. Use -1 to use all CPU
+        cores. Default 1.
+    cache: asreviewcontrib.insights.cache.LabelCache | None
+        Cache for the labels of the asreview files. Default None.
+    aggregate: bool | str
+        If "mean" or "median" (or True for "mean"), plot the mean or median
+        over all asreview files as a single curve with a band between the
+        `quantiles`, instead of a curve for each file. The files should have
+        the same number of records. Default False.
+    quantiles: tuple[float, float]
+        Lower and upper quantile of the band if `aggregate` is set.
+    decimate: bool
+        If True, reduce the curves to a few points per pixel of the axes.
+        This is faster for very long reviews, but the curves can differ from
+        the exact curves within the width of a pixel. Default False.
+    timings: asreviewcontrib.insights.timings.Timings | None
+        Record the time of loading each file and of plotting. Default None.
 
     Returns
     -------
@@ -150,21 +212,25 @@ def plot_wss(
     """
     if not isinstance(asreview_files, list):
         asreview_files = [asreview_files]
-    labels = []
-    for asreview_file in asreview_files:
-        labels.append(get_simulation_labels(asreview_file=asreview_file, priors=priors))
+    labels = _get_labels(
+        asreview_files, priors=priors, n_jobs=n_jobs, cache=cache, timings=timings
+    )
     if show_legend and legend_values is None:
         legend_values = [Path(fp).stem for fp in asreview_files]
 
-    return _plot_wss(
-        ax,
-        labels,
-        x_absolute=x_absolute,
-        y_absolute=y_absolute,
-        show_legend=show_legend,
-        legend_values=legend_values,
-        legend_kwargs=legend_kwargs,
-    )
+    with _stage(timings, "plot"):
+        return _plot_wss(
+            ax,
+            labels,
+            x_absolute=x_absolute,
+            y_absolute=y_absolute,
+            show_legend=show_legend,
+            legend_values=legend_values,
+            legend_kwargs=legend_kwargs,
+            aggregate=aggregate,
+            quantiles=quantiles,
+            decimate=decimate,
+        )
 
 
 def plot_erf(
@@ -176,6 +242,12 @@ def plot_erf(
     show_legend=True,
     legend_values=None,
     legend_kwargs=None,
+    n_jobs=1,
+    cache=None,
+    aggregate=False,
+    quantiles=(0.05, 0.95),
+    decimate=False,
+    timings=None,
 ):
     """Plot the ERF@T for all thresholds T.
 
@@ -201,6 +273,24 @@ def plot_erf(
         Dictionary of keyword arguments that are passed to the legend. See
         https://matplotlib.org/stable/api/_as_gen/matplotlib.pyplot.legend.html
         for the options.
+    n_jobs: int
+        Number of asreview files to load in parallel. Use -1 to use all CPU
+        cores. Default 1.
+    cache: asreviewcontrib.insights.cache.LabelCache | None
+        Cache for the labels of the asreview files. Default None.
+    aggregate: bool | str
+        If "mean" or "median" (or True for "mean"), plot the mean or median
+        over all asreview files as a single curve with a band between the
+        `quantiles`, instead of a curve for each file. The files should have
+        the same number of records. Default False.
+    quantiles: tuple[float, float]
+        Lower and upper quantile of the band if `aggregate` is set.
+    decimate: bool
+        If True, reduce the curves to a few points per pixel of the axes.
+        This is faster for very long reviews, but the curves can differ from
+        the exact curves within the width of a pixel. Default False.
+    timings: asreviewcontrib.insights.timings.Timings | None
+        Record the time of loading each file and of plotting. Default None.
 
     Returns
     -------
@@ -234,21 +324,199 @@ def plot_erf(
     """
     if not isinstance(asreview_files, list):
         asreview_files = [asreview_files]
-    labels = []
-    for asreview_file in asreview_files:
-        labels.append(get_simulation_labels(asreview_file=asreview_file, priors=priors))
+    labels = _get_labels(
+        asreview_files, priors=priors, n_jobs=n_jobs, cache=cache, timings=timings
+    )
     if show_legend and legend_values is None:
         legend_values = [Path(fp).stem for fp in asreview_files]
 
-    return _plot_erf(
-        ax,
-        labels,
-        x_absolute=x_absolute,
-        y_absolute=y_absolute,
-        show_legend=show_legend,
-        legend_values=legend_values,
-        legend_kwargs=legend_kwargs,
+    with _stage(timings, "plot"):
+        return _plot_erf(
+            ax,
+            labels,
+            x_absolute=x_absolute,
+            y_absolute=y_absolute,
+            show_legend=show_legend,
+            legend_values=legend_values,
+            legend_kwargs=legend_kwargs,
+            aggregate=aggregate,
+            quantiles=quantiles,
+            decimate=decimate,
+        )
+
+
+def plot_multiple(
+    axes,
+    asreview_files,
+    plot_types=("recall", "wss", "erf"),
+    priors=False,
+    x_absolute=False,
+    y_absolute=False,
+    show_random=True,
+    show_optimal=True,
+    show_legend=True,
+    legend_values=None,
+    legend_kwargs=None,
+    n_jobs=1,
+    cache=None,
+    aggregate=False,
+    quantiles=(0.05, 0.95),
+    decimate=False,
+    timings=None,
+):
+    """Plot multiple plot types of the same files, loading the files once.
+
+    The labels of the files are loaded and converted to label sets once, and
+    the label sets (with their cached curves) are shared by all plots.
+
+    Arguments
+    ---------
+    axes: list[matplotlib.axes.Axes]
+        An axes for each plot type, e.g. the subplots of a figure or the axes
+        of separate figures.
+    asreview_files: str | Path | list[str | Path]
+        (List of) asreview files.
+    plot_types: list[str]
+        The plot types, "recall", "wss" or "erf", in the order of the axes.
+    show_random, show_optimal: bool
+        Show the random curve and the optimal recall in the recall plot.
+
+    See `plot_recall` for the other arguments.
+
+    Returns
+    -------
+    list[matplotlib.axes.Axes]
+    """
+    if len(axes) != len(plot_types):
+        raise ValueError("Give an axes for each plot type.")
+    for plot_type in plot_types:
+        if plot_type not in PLOT_TYPES:
+            raise ValueError(f"Unknown plot type '{plot_type}'.")
+
+    if not isinstance(asreview_files, list):
+        asreview_files = [asreview_files]
+    labels = _get_labels(
+        asreview_files, priors=priors, n_jobs=n_jobs, cache=cache, timings=timings
     )
+    if show_legend and legend_values is None:
+        legend_values = [Path(fp).stem for fp in asreview_files]
+
+    # convert the labels once, the plots share the label sets
+    if aggregate:
+        labels = _as_label_matrix(labels)
+    else:
+        labels = _as_label_sets(labels)
+
+    for ax, plot_type in zip(axes, plot_types, strict=True):
+        kwargs = {}
+        if plot_type == "recall":
+            kwargs = {"show_random": show_random, "show_optimal": show_optimal}
+
+        with _stage(timings, "plot"):
+            PLOT_TYPES[plot_type](
+                ax,
+                labels,
+                x_absolute=x_absolute,
+                y_absolute=y_absolute,
+                show_legend=show_legend,
+                legend_values=legend_values,
+                legend_kwargs=legend_kwargs,
+                aggregate=aggregate,
+                quantiles=quantiles,
+                decimate=decimate,
+                **kwargs,
+            )
+
+    return axes
+
+
+def save_file_figures(
+    asreview_file, output, plot_types=("recall",), layout="subplots", **kwargs
+):
+    """Plot a single file and save the figure(s) to the output path(s).
+
+    The figures are created without pyplot, so no interactive backend is used
+    and the figures are not kept in memory. This makes the function safe to
+    run in worker processes, e.g. to save a figure for each of many files.
+
+    Arguments
+    ---------
+    asreview_file: str | Path
+        The asreview file to plot.
+    output: str
+        Path of the figure, a template with the fields `{stem}` (the name of
+        the asreview file without extension) and `{type}` (the plot type).
+    plot_types: list[str]
+        The plot types, "recall", "wss" or "erf".
+    layout: str
+        Plot multiple plot types side by side in a single figure ("subplots")
+        or in a figure for each plot type ("separate"). If the output has no
+        `{type}` field, the plot type is added to the name of separate figures.
+    kwargs:
+        Keyword arguments of `plot_multiple`.
+
+    Returns
+    -------
+    list[str]
+        The paths of the saved figures.
+    """
+    from matplotlib import rcParams
+    from matplotlib.figure import Figure
+
+    stem = Path(asreview_file).stem
+    width, height = rcParams["figure.figsize"]
+
+    if layout == "separate" and len(plot_types) > 1:
+        figs = [Figure() for _ in plot_types]
+        axes = [fig.subplots() for fig in figs]
+        outputs = []
+        for plot_type in plot_types:
+            fp = output.format(stem=stem, type=plot_type)
+            if "{type}" not in output:
+                fp = _plot_output_path(fp, plot_type)
+            outputs.append(str(fp))
+    else:
+        fig = Figure(figsize=(width * len(plot_types), height))
+        figs = [fig]
+        axes = list(fig.subplots(1, len(plot_types), squeeze=False)[0])
+        outputs = [output.format(stem=stem, type="-".join(plot_types))]
+
+    timings = kwargs.get("timings")
+    plot_multiple(axes, asreview_file, plot_types=plot_types, **kwargs)
+
+    with _stage(timings, "save", asreview_file):
+        for fig, fp in zip(figs, outputs, strict=True):
+            Path(fp).parent.mkdir(parents=True, exist_ok=True)
+            fig.savefig(fp)
+
+    return outputs
+
+
+def _plot_output_path(output, plot_type):
+    """Path of the figure of a plot type, e.g. plot_recall.png for plot.png."""
+    output = Path(output)
+    return output.with_name(f"{output.stem}_{plot_type}{output.suffix}")
+
+
+def _get_labels(asreview_files, priors=False, n_jobs=1, cache=None, timings=None):
+    """Load the labels of the asreview files, using a thread per file."""
+
+    def load_labels(asreview_file):
+        return get_simulation_labels(asreview_file, priors=priors, cache=cache)
+
+    # the threads load files at the same time, while the peak memory can only
+    # be measured for one stage at a time; the parallel load is a single stage
+    if _n_workers(n_jobs, len(asreview_files)) > 1:
+        with _stage(timings, "load"):
+            return list(
+                map_files(load_labels, asreview_files, n_jobs, executor="thread")
+            )
+
+    labels = []
+    for asreview_file in asreview_files:
+        with _stage(timings, "load", asreview_file):
+            labels.append(load_labels(asreview_file))
+    return labels
 
 
 # Plotting using labels.
@@ -262,21 +530,41 @@ def _plot_recall(
     show_legend=True,
     legend_values=None,
     legend_kwargs=None,
+    aggregate=False,
+    quantiles=(0.05, 0.95),
+    decimate=False,
 ):
     """Plot the recall.
 
-    labels : list
-        List containing labels, or list of lists containing labels.
+    labels : list | numpy.ndarray
+        List or 1-D array containing labels, or a list of lists or arrays, or a
+        2-D array with the labels of a run on each row.
+    aggregate : bool | str
+        Plot the "mean" or "median" over the runs with a band between the
+        quantiles, instead of a curve for each run.
+    quantiles : tuple[float, float]
+        Lower and upper quantile of the band.
+    decimate : bool
+        Reduce the curves to a few points per pixel of the axes.
     """
-    if not isinstance(labels[0], list):
-        labels = [labels]
-        show_legend = False
+    if aggregate:
+        labels = _as_label_matrix(labels)
+        x, y = _recall_matrix_values(
+            labels, x_absolute=x_absolute, y_absolute=y_absolute
+        )
+        ax = _add_aggregated_curve(ax, x, y, aggregate, quantiles, decimate)
+    else:
+        if not _is_multiple(labels):
+            show_legend = False
+        labels = _as_label_sets(labels)
 
-    if legend_values is None:
-        legend_values = [None for _ in labels]
+        if legend_values is None:
+            legend_values = [None for _ in labels]
 
-    for i, label_set in enumerate(labels):
-        ax = _add_recall_curve(ax, label_set, x_absolute, y_absolute, legend_values[i])
+        for i, label_set in enumerate(labels):
+            ax = _add_recall_curve(
+                ax, label_set, x_absolute, y_absolute, legend_values[i], decimate
+            )
     ax = _add_recall_info(ax, labels, x_absolute, y_absolute)
 
     if show_random:
@@ -302,21 +590,39 @@ def _plot_wss(
     show_legend=True,
     legend_values=None,
     legend_kwargs=None,
+    aggregate=False,
+    quantiles=(0.05, 0.95),
+    decimate=False,
 ):
     """Plot for each threshold T in [0,1] the WSS@T.
 
-    labels : list
-        List containing labels, or list of lists containing labels.
+    labels : list | numpy.ndarray
+        List or 1-D array containing labels, or a list of lists or arrays, or a
+        2-D array with the labels of a run on each row.
+    aggregate : bool | str
+        Plot the "mean" or "median" over the runs with a band between the
+        quantiles, instead of a curve for each run.
+    quantiles : tuple[float, float]
+        Lower and upper quantile of the band.
+    decimate : bool
+        Reduce the curves to a few points per pixel of the axes.
     """
-    if not isinstance(labels[0], list):
-        labels = [labels]
-        show_legend = False
+    if aggregate:
+        labels = _as_label_matrix(labels)
+        x, y = _wss_matrix_values(labels, x_absolute=x_absolute, y_absolute=y_absolute)
+        ax = _add_aggregated_curve(ax, x, y, aggregate, quantiles, decimate)
+    else:
+        if not _is_multiple(labels):
+            show_legend = False
+        labels = _as_label_sets(labels)
 
-    if legend_values is None:
-        legend_values = [None for _ in labels]
+        if legend_values is None:
+            legend_values = [None for _ in labels]
 
-    for i, label_set in enumerate(labels):
-        ax = _add_wss_curve(ax, label_set, x_absolute, y_absolute, legend_values[i])
+        for i, label_set in enumerate(labels):
+            ax = _add_wss_curve(
+                ax, label_set, x_absolute, y_absolute, legend_values[i], decimate
+            )
     ax = _add_wss_info(ax, labels, x_absolute, y_absolute)
 
     if show_legend:
@@ -336,21 +642,39 @@ def _plot_erf(
     show_legend=True,
     legend_values=None,
     legend_kwargs=None,
+    aggregate=False,
+    quantiles=(0.05, 0.95),
+    decimate=False,
 ):
     """Plot for each threshold T in [0,1] the ERF@T.
 
-    labels : list
-        List containing labels, or list of lists containing labels.
+    labels : list | numpy.ndarray
+        List or 1-D array containing labels, or a list of lists or arrays, or a
+        2-D array with the labels of a run on each row.
+    aggregate : bool | str
+        Plot the "mean" or "median" over the runs with a band between the
+        quantiles, instead of a curve for each run.
+    quantiles : tuple[float, float]
+        Lower and upper quantile of the band.
+    decimate : bool
+        Reduce the curves to a few points per pixel of the axes.
     """
-    if not isinstance(labels[0], list):
-        labels = [labels]
-        show_legend = False
+    if aggregate:
+        labels = _as_label_matrix(labels)
+        x, y = _erf_matrix_values(labels, x_absolute=x_absolute, y_absolute=y_absolute)
+        ax = _add_aggregated_curve(ax, x, y, aggregate, quantiles, decimate)
+    else:
+        if not _is_multiple(labels):
+            show_legend = False
+        labels = _as_label_sets(labels)
 
-    if legend_values is None:
-        legend_values = [None for _ in labels]
+        if legend_values is None:
+            legend_values = [None for _ in labels]
 
-    for i, label_set in enumerate(labels):
-        ax = _add_erf_curve(ax, label_set, x_absolute, y_absolute, legend_values[i])
+        for i, label_set in enumerate(labels):
+            ax = _add_erf_curve(
+                ax, label_set, x_absolute, y_absolute, legend_values[i], decimate
+            )
     ax = _add_erf_info(ax, labels, x_absolute, y_absolute)
 
     if show_legend:
@@ -362,16 +686,122 @@ def _plot_erf(
     return ax
 
 
+# Plot functions of the plot types, taking labels instead of files.
+PLOT_TYPES = {"recall": _plot_recall, "wss": _plot_wss, "erf": _plot_erf}
+
+
+def _max_counts(labels):
+    """Get the largest number of relevant records and records over all runs."""
+    if isinstance(labels, LabelMatrix):
+        return int(labels.n_pos_docs.max()), labels.n_docs
+
+    label_sets = _as_label_sets(labels)
+    n_pos_docs = max(label_set.n_pos_docs for label_set in label_sets)
+    n_docs = max(label_set.n_docs for label_set in label_sets)
+
+    return n_pos_docs, n_docs
+
+
 # Adding curves.
-def _add_recall_curve(ax, labels, x_absolute, y_absolute, legend_label=None):
+
+
+def _compress_step(x, y):
+    """Remove the points of a step curve that do not change its value.
+
+    For a step curve drawn with `where="post"`, a point with the same value as
+    the previous point only extends the previous step. Removing these points
+    does not change the curve. The first and the last point are always kept.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        The values of the x-axis.
+    y : numpy.ndarray
+        The values of the y-axis. For a 2-D array, a point is kept if the
+        value of one of the rows changes.
+
+    Returns
+    -------
+    tuple[numpy.ndarray, numpy.ndarray]
+        The x and y values of the points where the curve changes.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+
+    keep = np.ones(len(x), dtype=bool)
+    changed = y[..., 1:-1] != y[..., :-2]
+    keep[1:-1] = changed.any(axis=0) if changed.ndim == 2 else changed
+
+    return x[keep], y[..., keep]
+
+
+def _decimate_step(x, y, n_bins):
+    """Reduce a step curve to at most four points per bin of the x-axis.
+
+    The x-axis is divided into `n_bins` bins of equal width. For each bin, the
+    first, the last, the lowest and the highest point are kept, so the drawn
+    curve covers the same pixels as the full curve if there is a bin for each
+    pixel.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        The increasing values of the x-axis.
+    y : numpy.ndarray
+        The values of the y-axis. For a 2-D array, the points kept for any of
+        the rows are kept for all rows.
+    n_bins : int
+        The number of bins, typically the width of the axes in pixels.
+
+    Returns
+    -------
+    tuple[numpy.ndarray, numpy.ndarray]
+        The x and y values of the kept points.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+
+    if len(x) <= 4 * n_bins or x[-1] == x[0]:
+        return x, y
+
+    bins = np.minimum(((x - x[0]) / (x[-1] - x[0]) * n_bins).astype(int), n_bins - 1)
+    starts = np.flatnonzero(np.diff(bins, prepend=-1))
+    ends = np.append(starts[1:], len(x)) - 1
+
+    keep = [starts, ends]
+    for row in np.atleast_2d(y):
+        # sort the points by value within each bin
+        order = np.lexsort((row, bins))
+        keep.extend([order[starts], order[ends]])
+    keep = np.unique(np.concatenate(keep))
+
+    return x[keep], y[..., keep]
+
+
+def _n_pixels(ax):
+    return max(int(ax.get_window_extent().width), 1)
+
+
+def _step(ax, x, y, decimate=False, **kwargs):
+    """Draw a step curve through the points where the curve changes."""
+    x, y = _compress_step(x, y)
+    if decimate:
+        x, y = _decimate_step(x, y, _n_pixels(ax))
+
+    return ax.step(x, y, where="post", **kwargs)
+
+
+def _add_recall_curve(
+    ax, labels, x_absolute, y_absolute, legend_label=None, decimate=False
+):
     """Add a recall curve to a plot.
 
     Parameters
     ----------
     ax : plt.axes.Axes
         Axes on which to plot the curve.
-    labels : list
-        List of labels.
+    labels : list | numpy.ndarray | LabelSet
+        List or array of labels.
     x_absolute: bool
         If True, the number of records is on the x-axis.
         If False, the fraction of the whole dataset is on the x-axis.
@@ -380,6 +810,8 @@ def _add_recall_curve(ax, labels, x_absolute, y_absolute, legend_label=None):
         If False, the fraction of all included records found is on the y-axis.
     legend_label : str, optional
         Label to add to the legend for this curve, by default None
+    decimate : bool, optional
+        Reduce the curve to a few points per pixel of the axes, by default False
 
     Returns
     -------
@@ -387,7 +819,7 @@ def _add_recall_curve(ax, labels, x_absolute, y_absolute, legend_label=None):
         Axes with the recall curve added.
     """
     x, y = _recall_values(labels, x_absolute=x_absolute, y_absolute=y_absolute)
-    ax.step(x, y, where="post", label=legend_label)
+    _step(ax, x, y, decimate=decimate, label=legend_label)
     return ax
 
 
@@ -399,12 +831,7 @@ def _add_random_curve(ax, labels, x_absolute, y_absolute):
     plt.axes.Axes
         Axes with random curve added.
     """
-    if isinstance(labels[0], list):
-        n_pos_docs = max(sum(label_set) for label_set in labels)
-        n_docs = max(len(label_set) for label_set in labels)
-    else:
-        n_pos_docs = sum(labels)
-        n_docs = len(labels)
+    n_pos_docs, n_docs = _max_counts(labels)
 
     # add random line if required
     x = np.arange(1, n_docs + 1)
@@ -418,7 +845,7 @@ def _add_random_curve(ax, labels, x_absolute, y_absolute):
     else:
         y = recall_random / n_pos_docs
 
-    ax.step(x, y, color="black", where="post")
+    _step(ax, x, y, color="black")
 
     return ax
 
@@ -432,12 +859,7 @@ def _add_optimal_recall(ax, labels, x_absolute, y_absolute):
         Axes with optimal recall added.
     """
     # get total amount of positive labels
-    if isinstance(labels[0], list):
-        n_pos_docs = max(sum(label_set) for label_set in labels)
-        n_docs = max(len(label_set) for label_set in labels)
-    else:
-        n_pos_docs = sum(labels)
-        n_docs = len(labels)
+    n_pos_docs, n_docs = _max_counts(labels)
 
     # Create x and y arrays for step plot
     x = (
@@ -452,20 +874,84 @@ def _add_optimal_recall(ax, labels, x_absolute, y_absolute):
     )
 
     # Plot the stepwise optimal recall
-    ax.step(x, y, color="grey", where="post")
+    _step(ax, x, y, color="grey")
 
     return ax
 
 
-def _add_wss_curve(ax, labels, x_absolute=False, y_absolute=False, legend_label=None):
+def _add_wss_curve(
+    ax, labels, x_absolute=False, y_absolute=False, legend_label=None, decimate=False
+):
     x, y = _wss_values(labels, x_absolute=x_absolute, y_absolute=y_absolute)
-    ax.step(x, y, where="post", label=legend_label)
+    _step(ax, x, y, decimate=decimate, label=legend_label)
     return ax
 
 
-def _add_erf_curve(ax, labels, x_absolute=False, y_absolute=False, legend_label=None):
+def _add_erf_curve(
+    ax, labels, x_absolute=False, y_absolute=False, legend_label=None, decimate=False
+):
     x, y = _erf_values(labels, x_absolute=x_absolute, y_absolute=y_absolute)
-    ax.step(x, y, where="post", label=legend_label)
+    _step(ax, x, y, decimate=decimate, label=legend_label)
+    return ax
+
+
+def _add_aggregated_curve(
+    ax, x, y, aggregate="mean", quantiles=(0.05, 0.95), decimate=False
+):
+    """Add the mean or median of multiple curves with a quantile band to a plot.
+
+    Parameters
+    ----------
+    ax : plt.axes.Axes
+        Axes on which to plot the curve.
+    x : numpy.ndarray
+        The values of the x-axis, shared by all curves.
+    y : numpy.ndarray
+        The values of the y-axis, with a curve on each row.
+    aggregate : bool | str
+        Plot the "mean" or the "median" (True for the mean) of the curves.
+    quantiles : tuple[float, float]
+        Lower and upper quantile of the band.
+    decimate : bool
+        Reduce the curves to a few points per pixel of the axes.
+
+    Returns
+    -------
+    plt.axes.Axes
+        Axes with the aggregated curve added.
+    """
+    if aggregate is True:
+        aggregate = "mean"
+
+    if aggregate == "mean":
+        center = y.mean(axis=0)
+    elif aggregate == "median":
+        center = np.median(y, axis=0)
+    else:
+        raise ValueError(f"Unknown aggregate '{aggregate}', use 'mean' or 'median'.")
+
+    lower, upper = np.quantile(y, quantiles, axis=0)
+    n_runs = len(y)
+
+    x, (center, lower, upper) = _compress_step(x, np.vstack([center, lower, upper]))
+    if decimate:
+        x, (center, lower, upper) = _decimate_step(
+            x, np.vstack([center, lower, upper]), _n_pixels(ax)
+        )
+
+    (line,) = ax.step(
+        x, center, where="post", label=f"{aggregate.capitalize()} of {n_runs} runs"
+    )
+    ax.fill_between(
+        x,
+        lower,
+        upper,
+        step="post",
+        alpha=0.3,
+        color=line.get_color(),
+        label=f"{quantiles[0]:.0%}-{quantiles[1]:.0%} quantiles",
+    )
+
     return ax
 
 
@@ -478,10 +964,7 @@ def _add_recall_info(ax, labels, x_absolute=False, y_absolute=False):
     plt.axes.Axes
         Axes with title, x-axis and y-axis set for a recall plot.
     """
-    if isinstance(labels[0], list):
-        n_pos_docs = max(sum(label_set) for label_set in labels)
-    else:
-        n_pos_docs = sum(labels)
+    n_pos_docs, _ = _max_counts(labels)
 
     if y_absolute:
         y_lim = [-n_pos_docs * 0.05, n_pos_docs * 1.05]
@@ -516,10 +999,7 @@ def _add_wss_info(ax, labels, x_absolute=False, y_absolute=False):
     plt.axes.Axes
         Axes with title, x-axis and y-axis set for a WSS plot.
     """
-    if isinstance(labels[0], list):
-        n_docs = max(len(label_set) for label_set in labels)
-    else:
-        n_docs = len(labels)
+    _, n_docs = _max_counts(labels)
 
     if y_absolute:
         y_lim = [-n_docs * 0.05, n_docs * 1.05]
@@ -550,10 +1030,7 @@ def _add_erf_info(ax, labels, x_absolute=False, y_absolute=False):
     plt.axes.Axes
         Axes with title, x-axis and y-axis set for a ERF plot.
     """
-    if isinstance(labels[0], list):
-        n_pos_docs = max(sum(label_set) for label_set in labels)
-    else:
-        n_pos_docs = sum(labels)
+    n_pos_docs, _ = _max_counts(labels)
 
     if y_absolute:
         y_lim = [-n_pos_docs * 0.05, n_pos_docs * 1.05]
@@ -0,0 +1,237 @@
+import numpy as np
+
+from asreviewcontrib.insights.algorithms import _as_label_matrix
+
+
+def _first_at_least(values, thresholds):
+    """Index of the first value at least each threshold, for each row.
+
+    The values have to be nondecreasing along the rows. The rows are shifted
+    to disjoint ranges of values, so all rows and thresholds are searched with
+    a single binary search in the flattened array.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Integer array of shape (n_runs, n_docs), nondecreasing along the rows.
+    thresholds : numpy.ndarray
+        Integer thresholds, of shape (n_thresholds,).
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (n_runs, n_thresholds) with the index of the first
+        value at least the threshold, or n_docs if no value is.
+    """
+    n_runs, n_docs = values.shape
+    if n_docs == 0:
+        return np.zeros((n_runs, len(thresholds)), dtype=np.int64)
+
+    v_min = int(values.min())
+    span = int(values.max()) - v_min + 1
+    offsets = np.arange(n_runs, dtype=np.int64)[:, None] * span
+
+    flat = (values - v_min + offsets).ravel()
+    thresholds = np.clip(np.asarray(thresholds, dtype=np.int64) - v_min, 0, span)
+    i = np.searchsorted(flat, thresholds[None, :] + offsets, side="left")
+
+    return i - np.arange(n_runs, dtype=np.int64)[:, None] * n_docs
+
+
+def stop_consecutive_irrelevant(labels, n):
+    """Stop after a number of consecutive irrelevant records.
+
+    Parameters
+    ----------
+    labels : LabelMatrix | numpy.ndarray | list
+        The labels of the runs, see `LabelMatrix`.
+    n : int | list[int]
+        Number(s) of consecutive irrelevant records to stop after.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (n_runs, len(n)) with the number of records screened
+        when stopping. If the rule never stops, all records are screened.
+    """
+    label_matrix = _as_label_matrix(labels)
+    n = np.atleast_1d(n)
+    if (n < 1).any():
+        raise ValueError("The number of consecutive records should be at least 1.")
+
+    # length of the run of irrelevant records ending at each record, from the
+    # position of the last relevant record so far
+    i = np.arange(label_matrix.n_docs, dtype=np.int64)
+    is_relevant = np.diff(label_matrix.tp, axis=1, prepend=0) > 0
+    last_relevant = np.maximum.accumulate(np.where(is_relevant, i, -1), axis=1)
+    run_length = np.maximum.accumulate(i - last_relevant, axis=1)
+
+    return np.minimum(_first_at_least(run_length, n) + 1, label_matrix.n_docs)
+
+
+def stop_screened_fraction(labels, fraction):
+    """Stop after screening a fraction of the records.
+
+    Parameters
+    ----------
+    labels : LabelMatrix | numpy.ndarray | list
+        The labels of the runs, see `LabelMatrix`.
+    fraction : float | list[float]
+        Fraction(s) of the records to screen, between 0 and 1.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (n_runs, len(fraction)) with the number of records
+        screened when stopping.
+    """
+    label_matrix = _as_label_matrix(labels)
+    fraction = np.atleast_1d(fraction)
+
+    # round first, so a product like 0.07 * 100 = 7.000000000000001 is not
+    # rounded up to the next record
+    n_screened = np.ceil(np.round(fraction * label_matrix.n_docs, 9)).astype(np.int64)
+    n_screened = np.clip(n_screened, 0, label_matrix.n_docs)
+
+    return np.broadcast_to(n_screened, (label_matrix.n_runs, len(fraction))).copy()
+
+
+def stop_hit_rate(labels, window, threshold):
+    """Stop when the hit rate in a sliding window drops below a threshold.
+
+    The hit rate is the fraction of relevant records in the last `window`
+    screened records. The rule stops at the first record where the hit rate
+    is below `threshold`, after at least `window` records are screened.
+
+    Parameters
+    ----------
+    labels : LabelMatrix | numpy.ndarray | list
+        The labels of the runs, see `LabelMatrix`.
+    window : int
+        Number of records in the sliding window.
+    threshold : float | list[float]
+        Threshold(s) of the hit rate.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (n_runs, len(threshold)) with the number of records
+        screened when stopping. If the rule never stops, all records are
+        screened.
+    """
+    label_matrix = _as_label_matrix(labels)
+    threshold = np.atleast_1d(threshold)
+    if window < 1:
+        raise ValueError("The window should be at least 1 record.")
+
+    n_runs, n_docs = label_matrix.n_runs, label_matrix.n_docs
+    if window > n_docs:
+        return np.full((n_runs, len(threshold)), n_docs, dtype=np.int64)
+
+    # relevant records in the window ending at each record, from the
+    # cumulative number of relevant records; the first window ends at
+    # record window - 1
+    tp = label_matrix.tp
+    hits = tp[:, window - 1 :].astype(np.int64)
+    hits[:, 1:] -= tp[:, : n_docs - window]
+
+    # the rule stops at the first window with hits < ceil(threshold * window),
+    # found with the running minimum of the hits; the product is rounded first
+    # to remove the floating point error of e.g. 0.07 * 100
+    min_hits = np.minimum.accumulate(hits, axis=1)
+    max_hits = np.ceil(np.round(threshold * window, 9)).astype(np.int64) - 1
+    i = _first_at_least(-min_hits, -max_hits)
+
+    return np.minimum(i + window, n_docs)
+
+
+def _stopping_metrics(label_matrix, n_screened):
+    """Recall and work saved of each run when stopping after n_screened."""
+    i = np.maximum(n_screened - 1, 0)[:, None]
+    tp = np.where(
+        n_screened > 0, np.take_along_axis(label_matrix.tp, i, axis=1)[:, 0], 0
+    )
+
+    recall = tp / label_matrix.n_pos_docs
+    work_saved = (label_matrix.n_docs - n_screened) / label_matrix.n_docs
+
+    return recall, work_saved
+
+
+def evaluate_stopping_rules(
+    labels, consecutive=None, fraction=None, window=None, threshold=None
+):
+    """Evaluate a grid of stopping rules over multiple runs.
+
+    Each rule is evaluated for all runs and all values of its parameter at
+    once. For the hit rate rule, each combination of window and threshold is
+    evaluated.
+
+    Parameters
+    ----------
+    labels : LabelMatrix | numpy.ndarray | list
+        The labels of the runs, a LabelMatrix, a 2-D array with a run on each
+        row or a list of label lists, e.g. from `get_simulation_labels`. All
+        runs should have the same number of records.
+    consecutive : list[int], optional
+        Numbers of consecutive irrelevant records to stop after, see
+        `stop_consecutive_irrelevant`.
+    fraction : list[float], optional
+        Fractions of the records to screen, see `stop_screened_fraction`.
+    window : list[int], optional
+        Windows of the hit rate rule, see `stop_hit_rate`.
+    threshold : list[float], optional
+        Thresholds of the hit rate rule, see `stop_hit_rate`. Required if
+        `window` is given.
+
+    Returns
+    -------
+    list[dict]
+        A dict for each rule and parameter combination, with the name of the
+        rule ("consecutive", "fraction" or "hit_rate"), the parameters, and the
+        number of records screened, the recall and the work saved (the
+        fraction of records that was not screened) of each run when stopping.
+    """
+    label_matrix = _as_label_matrix(labels)
+    if (window is None) != (threshold is None):
+        raise ValueError("The hit rate rule needs both a window and a threshold.")
+
+    rules = []
+    if consecutive is not None:
+        n_screened = stop_consecutive_irrelevant(label_matrix, consecutive)
+        rules.extend(
+            ("consecutive", {"n": int(n)}, n_screened[:, j])
+            for j, n in enumerate(np.atleast_1d(consecutive))
+        )
+    if fraction is not None:
+        n_screened = stop_screened_fraction(label_matrix, fraction)
+        rules.extend(
+            ("fraction", {"fraction": float(f)}, n_screened[:, j])
+            for j, f in enumerate(np.atleast_1d(fraction))
+        )
+    if window is not None:
+        for w in np.atleast_1d(window):
+            n_screened = stop_hit_rate(label_matrix, int(w), threshold)
+            rules.extend(
+                (
+                    "hit_rate",
+                    {"window": int(w), "threshold": float(t)},
+                    n_screened[:, j],
+                )
+                for j, t in enumerate(np.atleast_1d(threshold))
+            )
+
+    results = []
+    for rule, parameters, n_screened in rules:
+        recall, work_saved = _stopping_metrics(label_matrix, n_screened)
+        results.append(
+            {
+                "rule": rule,
+                "parameters": parameters,
+                "n_screened": n_screened,
+                "recall": recall,
+                "work_saved": work_saved,
+            }
+        )
+
+    return results
@@ -0,0 +1,85 @@
+import contextlib
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+
+class Timings:
+    """Wall time and peak memory of the stages of processing files.
+
+    The peak memory is only measured if tracemalloc is tracing, see
+    `start_tracing`. Stages should not be nested, as each stage resets the
+    peak of the traced memory. Stages in other threads overlap, so files that
+    are loaded in parallel threads are measured as a single stage.
+
+    Attributes
+    ----------
+    records : list[dict]
+        A record for each stage, with the file, the name of the stage, the wall
+        time in seconds and the peak memory in bytes (None if not traced).
+    """
+
+    def __init__(self):
+        self.records = []
+
+    @contextlib.contextmanager
+    def stage(self, name, asreview_file=None):
+        """Measure a stage of processing a file."""
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.records.append(
+                {
+                    "file": None if asreview_file is None else str(asreview_file),
+                    "stage": name,
+                    "time": time.perf_counter() - start,
+                    "peak": tracemalloc.get_traced_memory()[1] if tracing else None,
+                }
+            )
+
+    def summary(self):
+        """Format the records and the total time of each stage as a table."""
+        width = max([len("file"), *(len(r["file"] or "") for r in self.records)])
+        lines = [f"{'file':<{width}} {'stage':<8} {'time (s)':>10} {'peak (MB)':>10}"]
+
+        totals = {}
+        for r in self.records:
+            peak = "" if r["peak"] is None else f"{r['peak'] / 2**20:.2f}"
+            lines.append(
+                f"{r['file'] or '':<{width}} {r['stage']:<8} {r['time']:>10.4f} "
+                f"{peak:>10}"
+            )
+            totals[r["stage"]] = totals.get(r["stage"], 0) + r["time"]
+
+        for stage, seconds in totals.items():
+            lines.append(f"{'total':<{width}} {stage:<8} {seconds:>10.4f}")
+
+        return "\n".join(lines)
+
+    def write(self, fp):
+        """Write the records to a JSON file."""
+        with open(fp, "w") as f:
+            json.dump(self.records, f, indent=4)
+
+
+def _stage(timings, name, asreview_file=None):
+    if timings is None:
+        return contextlib.nullcontext()
+    return timings.stage(name, asreview_file)
+
+
+def start_tracing():
+    """Start tracing the memory for the peak memory of the stages."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def timings_path(output):
+    """Path of the timings file next to an output file."""
+    return Path(output).with_name(Path(output).name + ".timings.json")
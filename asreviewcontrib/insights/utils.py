@@ -1,11 +1,158 @@
+import json
+import os
+import shutil
+import sqlite3
 import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import NamedTuple
 
 import numpy as np
-from asreview import Project
-from asreview import open_state
 
+PATH_PROJECT_CONFIG = "project.json"
+PATH_DATA_STORE = "data_store.db"
 
-def get_simulation_labels(asreview_file, priors=False):
+# Buffer size used to stream the SQLite members out of the archive.
+_COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class SimulationResults(NamedTuple):
+    """Labeling results of a single review in an ASReview project.
+
+    Attributes
+    ----------
+    n_records : int
+        Number of records in the data store of the project.
+    record_ids : numpy.ndarray
+        Record identifiers in the order they were labeled (priors included).
+    labels : numpy.ndarray
+        Labels (0 or 1) in the order they were labeled (priors included).
+    is_prior : numpy.ndarray
+        Boolean mask marking the records that were used as prior knowledge.
+    """
+
+    n_records: int
+    record_ids: np.ndarray
+    labels: np.ndarray
+    is_prior: np.ndarray
+
+    @property
+    def n_priors(self):
+        return int(self.is_prior.sum())
+
+
+def _state_member(project_config, review_id=None):
+    if review_id is None:
+        if len(project_config["reviews"]) == 0:
+            raise FileNotFoundError("State does not exist in the project")
+        review_id = project_config["reviews"][0]["id"]
+
+    return f"reviews/{review_id}/results.db"
+
+
+@contextmanager
+def _open_project_databases(asreview_file, review_id=None):
+    """Open the data store and the state of a project as SQLite connections.
+
+    Only the two SQLite databases are read from the project. For an
+    .asreview archive, they are streamed into a temporary directory; the
+    dataset, feature matrices and models in the archive are never extracted.
+
+    Parameters
+    ----------
+    asreview_file : str | Path
+        Path to an .asreview file or to an unzipped project folder.
+    review_id : str, optional
+        Identifier of the review to open. If None, the first review is used.
+
+    Yields
+    ------
+    tuple[sqlite3.Connection, sqlite3.Connection]
+        Read-only connections to the data store and to the state.
+    """
+    asreview_file = Path(asreview_file).resolve()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if asreview_file.is_dir():
+            with open(Path(asreview_file, PATH_PROJECT_CONFIG)) as f:
+                project_config = json.load(f)
+
+            fp_data_store = Path(asreview_file, PATH_DATA_STORE)
+            fp_state = Path(asreview_file, _state_member(project_config, review_id))
+        else:
+            with zipfile.ZipFile(asreview_file) as archive:
+                project_config = json.loads(archive.read(PATH_PROJECT_CONFIG))
+
+                fp_data_store = Path(tmpdir, "data_store.db")
+                fp_state = Path(tmpdir, "results.db")
+                for member, fp in [
+                    (PATH_DATA_STORE, fp_data_store),
+                    (_state_member(project_config, review_id), fp_state),
+                ]:
+                    with archive.open(member) as src, open(fp, "wb") as dst:
+                        shutil.copyfileobj(src, dst, _COPY_BUFFER_SIZE)
+
+        con_data_store = sqlite3.connect(f"{fp_data_store.as_uri()}?mode=ro", uri=True)
+        con_state = sqlite3.connect(f"{fp_state.as_uri()}?mode=ro", uri=True)
+        try:
+            yield con_data_store, con_state
+        finally:
+            con_data_store.close()
+            con_state.close()
+
+
+def read_simulation_results(asreview_file, review_id=None, cache=None):
+    """Read the record count and the labeling results of a project.
+
+    Parameters
+    ----------
+    asreview_file : str | Path
+        Path to an .asreview file or to an unzipped project folder.
+    review_id : str, optional
+        Identifier of the review to read. If None, the first review is used.
+    cache : asreviewcontrib.insights.cache.LabelCache, optional
+        Cache to read the results from and to store the results in. By
+        default None, in which case the project is always read.
+
+    Returns
+    -------
+    SimulationResults
+        The number of records and the labeled records in labeling order.
+    """
+    if cache is not None:
+        results = cache.get(asreview_file, review_id=review_id)
+        if results is not None:
+            return results
+
+    with _open_project_databases(asreview_file, review_id=review_id) as (
+        con_data_store,
+        con_state,
+    ):
+        (n_records,) = con_data_store.execute("SELECT COUNT(*) FROM record").fetchone()
+        rows = con_state.execute(
+            "SELECT record_id, label, querier IS NULL FROM results "
+            "WHERE label IS NOT NULL ORDER BY rowid"
+        ).fetchall()
+
+    data = np.array(rows, dtype=np.int64).reshape(-1, 3)
+
+    results = SimulationResults(
+        n_records=n_records,
+        record_ids=data[:, 0],
+        labels=data[:, 1],
+        is_prior=data[:, 2].astype(bool),
+    )
+
+    if cache is not None:
+        cache.put(asreview_file, results, review_id=review_id)
+
+    return results
+
+
+def get_simulation_labels(asreview_file, priors=False, cache=None):
     """Get the list of labels from an asreview file.
 
     Parameters
@@ -14,6 +161,8 @@ def get_simulation_labels(asreview_file, priors=False):
         Path to an asreview file.
     priors : bool, optional
         Include the prior labels, by default False
+    cache : asreviewcontrib.insights.cache.LabelCache, optional
+        Cache for the labeling results, by default None
 
     Returns
     -------
@@ -21,24 +170,110 @@ def get_simulation_labels(asreview_file, priors=False):
         List of labels (0 or 1) from an asreview file. If `priors=False`, the labels of
         the prior records are skipped.
     """
-    with tempfile.TemporaryDirectory() as tmpdir:
-        project = Project.load(asreview_file=asreview_file, project_path=tmpdir)
-        n_records = len(project.data_store)
-
-    with open_state(asreview_file) as state_obj:
-        # get the labels
-        labels = state_obj.get_results_table(columns="label", priors=priors)[
-            "label"
-        ].to_list()
-        if priors:
-            n_priors_to_skip = 0
-        else:
-            n_priors_to_skip = len(state_obj.get_priors())
+    results = read_simulation_results(asreview_file, cache=cache)
+
+    return _simulation_labels(results, priors=priors)
+
+
+def _labeled_records(results, priors=False):
+    """Get the record ids and labels of the labeled records.
+
+    Parameters
+    ----------
+    results : SimulationResults
+        Results of an asreview file.
+    priors : bool, optional
+        Include the prior records, by default False
+
+    Returns
+    -------
+    tuple[numpy.ndarray, numpy.ndarray]
+        Record ids and labels in the order the records were labeled.
+    """
+    if priors:
+        return results.record_ids, results.labels
 
-    n_used_records = n_records - n_priors_to_skip
+    return results.record_ids[~results.is_prior], results.labels[~results.is_prior]
+
+
+def _simulation_labels(results, priors=False):
+    """Get the labels of all records, with the unlabeled records as 0."""
+    _, labels = _labeled_records(results, priors=priors)
+
+    n_priors_to_skip = 0 if priors else results.n_priors
+    n_used_records = results.n_records - n_priors_to_skip
 
     # if less labels than records, check if all labels available
+    labels = labels.tolist()
     if len(labels) < n_used_records:
-        labels = labels + np.zeros(n_used_records - len(labels)).tolist()
+        labels = labels + [0] * (n_used_records - len(labels))
 
     return labels
+
+
+def _simulation_positions(results, priors=False):
+    """Get the positions of the relevant records and the number of records.
+
+    The same label set as `_simulation_labels`, without the list of labels of
+    all records.
+
+    Returns
+    -------
+    tuple[numpy.ndarray, int]
+        The positions (0-based) of the relevant records in the labeling order,
+        and the number of records.
+    """
+    _, labels = _labeled_records(results, priors=priors)
+
+    n_priors_to_skip = 0 if priors else results.n_priors
+    n_used_records = results.n_records - n_priors_to_skip
+
+    return np.flatnonzero(labels), max(len(labels), n_used_records)
+
+
+def _n_workers(n_jobs, n_tasks):
+    if n_jobs is None or not (n_jobs >= 1 or n_jobs == -1):
+        raise ValueError("n_jobs should be a positive integer or -1.")
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+
+    return max(1, min(n_jobs, n_tasks))
+
+
+def map_files(func, asreview_files, n_jobs=1, executor="process"):
+    """Apply a function to each file, optionally in parallel.
+
+    Parameters
+    ----------
+    func : callable
+        Function that takes a single file as argument. If `executor="process"`,
+        the function and its return value have to be picklable.
+    asreview_files : list[str | Path]
+        List of asreview files.
+    n_jobs : int, optional
+        Number of files to process in parallel. Use -1 to use all CPU cores. By
+        default 1, in which case the files are processed serially.
+    executor : str, optional
+        Run the jobs in a "process" pool or a "thread" pool, by default "process".
+
+    Yields
+    ------
+    object
+        The return value of `func` for each file, in the order of
+        `asreview_files`.
+    """
+    n_workers = _n_workers(n_jobs, len(asreview_files))
+
+    if n_workers == 1:
+        yield from map(func, asreview_files)
+        return
+
+    if executor == "process":
+        pool = ProcessPoolExecutor(max_workers=n_workers)
+    elif executor == "thread":
+        pool = ThreadPoolExecutor(max_workers=n_workers)
+    else:
+        raise ValueError(f"Unknown executor '{executor}'.")
+
+    with pool:
+        yield from pool.map(func, asreview_files)
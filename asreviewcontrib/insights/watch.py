@@ -0,0 +1,236 @@
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from asreviewcontrib.insights.algorithms import LabelSet
+from asreviewcontrib.insights.metrics import _metrics_from_labels
+from asreviewcontrib.insights.utils import _open_project_databases
+
+
+class _LabeledRows(NamedTuple):
+    """Summary of a range of rows of the results table.
+
+    Attributes
+    ----------
+    n_labeled : int
+        Number of labeled records, without the priors if they are excluded.
+    n_priors : int
+        Number of labeled prior records.
+    positions : list[int]
+        Positions of the relevant records in the labeling order.
+    td : list[tuple[int, int]]
+        Record id and time to discovery of the relevant records.
+    """
+
+    n_labeled: int
+    n_priors: int
+    positions: list
+    td: list
+
+
+def _read_rows(rows, start=0, priors=False):
+    """Summarize rows (record_id, label, is_prior) of the results table.
+
+    The positions of the relevant records start at `start`, the number of
+    labeled records before the rows.
+    """
+    n_labeled = start
+    n_priors = 0
+    positions = []
+    td = []
+    for record_id, label, is_prior in rows:
+        if is_prior:
+            n_priors += 1
+            if not priors:
+                continue
+        if label == 1:
+            positions.append(n_labeled)
+            td.append((record_id, n_labeled + 1))
+        n_labeled += 1
+
+    return _LabeledRows(n_labeled - start, n_priors, positions, td)
+
+
+class ReviewWatcher:
+    """Labeling results of a review in progress, read incrementally.
+
+    Each update only reads the rows of the results table that were added since
+    the previous update, and the rows that were still waiting for a label. The
+    rows before the first unlabeled row are summarized by the number of
+    labeled records and the positions of the relevant records, so updating
+    takes time in the number of new rows. The metrics are computed from these
+    positions, without the labels of all records.
+
+    If labels were changed or removed since the previous update, all rows are
+    read again. An .asreview file is only read again if it was modified.
+
+    Parameters
+    ----------
+    asreview_file : str | Path
+        Path to an unzipped project folder of a review in progress, or to an
+        .asreview file.
+    priors : bool, optional
+        Include the prior labels, by default False
+    review_id : str, optional
+        Identifier of the review to read. If None, the first review is used.
+    """
+
+    def __init__(self, asreview_file, priors=False, review_id=None):
+        self.asreview_file = asreview_file
+        self.priors = priors
+        self.review_id = review_id
+
+        self.n_records = 0
+        self._file_version = None
+        self._reset()
+
+    def _reset(self):
+        self._n_changes = 0
+        self._next_rowid = 0
+        self._head = _LabeledRows(0, 0, [], [])
+        self._tail = _LabeledRows(0, 0, [], [])
+
+    def _version(self):
+        path = Path(self.asreview_file)
+        if path.is_dir():
+            return None
+
+        stat = path.stat()
+        return stat.st_size, stat.st_mtime_ns
+
+    def update(self):
+        """Read the labels added since the previous update.
+
+        Returns
+        -------
+        bool
+            True if the results changed since the previous update.
+        """
+        version = self._version()
+        if version is not None and version == self._file_version:
+            return False
+
+        with _open_project_databases(self.asreview_file, self.review_id) as (
+            con_data_store,
+            con_state,
+        ):
+            (n_records,) = con_data_store.execute(
+                "SELECT COUNT(*) FROM record"
+            ).fetchone()
+            (n_changes,) = con_state.execute(
+                "SELECT COUNT(*) FROM decision_changes"
+            ).fetchone()
+
+            changed = n_records != self.n_records
+            if n_changes != self._n_changes:
+                self._reset()
+                self._n_changes = n_changes
+                changed = True
+
+            rows = con_state.execute(
+                "SELECT rowid, record_id, label, querier IS NULL FROM results "
+                "WHERE rowid >= ? ORDER BY rowid",
+                (self._next_rowid,),
+            ).fetchall()
+
+        self.n_records = n_records
+        self._file_version = version
+
+        # the rows before the first unlabeled row are final, the labeled rows
+        # after it are read again at the next update
+        n_final = next((i for i, row in enumerate(rows) if row[2] is None), len(rows))
+        if n_final:
+            head = _read_rows(
+                (row[1:] for row in rows[:n_final]),
+                start=self._head.n_labeled,
+                priors=self.priors,
+            )
+            self._head.positions.extend(head.positions)
+            self._head.td.extend(head.td)
+            self._head = self._head._replace(
+                n_labeled=self._head.n_labeled + head.n_labeled,
+                n_priors=self._head.n_priors + head.n_priors,
+            )
+            self._next_rowid = rows[n_final - 1][0] + 1
+            changed = True
+
+        tail = _read_rows(
+            (row[1:] for row in rows[n_final:] if row[2] is not None),
+            start=self._head.n_labeled,
+            priors=self.priors,
+        )
+        changed = changed or tail != self._tail
+        self._tail = tail
+
+        return changed
+
+    @property
+    def n_docs(self):
+        """Number of records, without the priors if they are excluded."""
+        n_labeled = self._head.n_labeled + self._tail.n_labeled
+        n_priors = self._head.n_priors + self._tail.n_priors
+        n_used_records = self.n_records - (0 if self.priors else n_priors)
+
+        return max(n_labeled, n_used_records)
+
+    @property
+    def labels(self):
+        """Label set of the records labeled so far."""
+        positions = np.array(
+            self._head.positions + self._tail.positions, dtype=np.int64
+        )
+
+        return LabelSet.from_positions(positions, self.n_docs)
+
+    @property
+    def time_to_discovery(self):
+        """Record id and time to discovery of the relevant records found."""
+        return self._head.td + self._tail.td
+
+    def get_metrics(self, **kwargs):
+        """Compute the metrics of the records labeled so far.
+
+        Parameters
+        ----------
+        **kwargs
+            The recall, wss, erf and cm intercepts, x_absolute, y_absolute and
+            version, see `get_metrics`.
+
+        Returns
+        -------
+        dict
+            The metrics, in the same layout as `get_metrics`.
+        """
+        return _metrics_from_labels(self.labels, self.time_to_discovery, **kwargs)
+
+
+def watch(watchers, interval=60, n_polls=None):
+    """Poll reviews in progress and yield the reviews that changed.
+
+    Parameters
+    ----------
+    watchers : list[ReviewWatcher]
+        The reviews to poll.
+    interval : float, optional
+        Time between two polls in seconds, by default 60.
+    n_polls : int, optional
+        Stop after the given number of polls. By default None, in which case
+        the reviews are polled until interrupted.
+
+    Yields
+    ------
+    ReviewWatcher
+        A review of which the results changed since the previous poll. At the
+        first poll, all reviews are yielded.
+    """
+    i_poll = 0
+    while n_polls is None or i_poll < n_polls:
+        if i_poll > 0:
+            time.sleep(interval)
+
+        for watcher in watchers:
+            if watcher.update():
+                yield watcher
+        i_poll += 1
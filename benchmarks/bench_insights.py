@@ -0,0 +1,380 @@
+"""Benchmarks for the metrics and plotting hot paths of asreview-insights.
+
+Run from the root of the repository:
+
+    python benchmarks/bench_insights.py
+
+See benchmarks/README.md for the options.
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+from asreviewcontrib.insights.algorithms import LabelMatrix  # noqa: E402
+from asreviewcontrib.insights.algorithms import _erf_matrix_values  # noqa: E402
+from asreviewcontrib.insights.algorithms import _erf_values  # noqa: E402
+from asreviewcontrib.insights.algorithms import _fn_values  # noqa: E402
+from asreviewcontrib.insights.algorithms import _fp_values  # noqa: E402
+from asreviewcontrib.insights.algorithms import _loss_value  # noqa: E402
+from asreviewcontrib.insights.algorithms import _recall_matrix_values  # noqa: E402
+from asreviewcontrib.insights.algorithms import _recall_values  # noqa: E402
+from asreviewcontrib.insights.algorithms import _tn_values  # noqa: E402
+from asreviewcontrib.insights.algorithms import _tp_values  # noqa: E402
+from asreviewcontrib.insights.algorithms import _wss_matrix_values  # noqa: E402
+from asreviewcontrib.insights.algorithms import _wss_values  # noqa: E402
+from asreviewcontrib.insights.entrypoint import MetricsEntryPoint  # noqa: E402
+from asreviewcontrib.insights.metrics import get_metrics  # noqa: E402
+from asreviewcontrib.insights.plot import _plot_erf  # noqa: E402
+from asreviewcontrib.insights.plot import _plot_recall  # noqa: E402
+from asreviewcontrib.insights.plot import _plot_wss  # noqa: E402
+from asreviewcontrib.insights.plot import plot_erf  # noqa: E402
+from asreviewcontrib.insights.plot import plot_recall  # noqa: E402
+from asreviewcontrib.insights.plot import plot_wss  # noqa: E402
+from asreviewcontrib.insights.utils import get_simulation_labels  # noqa: E402
+
+TEST_ASREVIEW_FILES = Path(Path(__file__).parent.parent, "tests", "asreview_files")
+
+# the generator of synthetic ASReview files lives with the tests
+sys.path.insert(0, str(Path(Path(__file__).parent.parent, "tests")))
+from synthetic import make_asreview_file  # noqa: E402
+from synthetic import synthetic_order  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_PREVALENCES = [0.01, 0.1]
+
+CURVE_FUNCS = {
+    "_recall_values": _recall_values,
+    "_wss_values": _wss_values,
+    "_erf_values": _erf_values,
+    "_tp_values": _tp_values,
+    "_fp_values": _fp_values,
+    "_tn_values": _tn_values,
+    "_fn_values": _fn_values,
+    "_loss_value": _loss_value,
+}
+
+MATRIX_FUNCS = {
+    "_recall_matrix_values": _recall_matrix_values,
+    "_wss_matrix_values": _wss_matrix_values,
+    "_erf_matrix_values": _erf_matrix_values,
+}
+
+PLOT_FUNCS = {
+    "_plot_recall": _plot_recall,
+    "_plot_wss": _plot_wss,
+    "_plot_erf": _plot_erf,
+}
+PLOT_FILE_FUNCS = {
+    "plot_recall": plot_recall,
+    "plot_wss": plot_wss,
+    "plot_erf": plot_erf,
+}
+
+
+def synthetic_labels(n_records, prevalence, effect=2.0, seed=None):
+    """Generate the labels of a simulated review in screening order.
+
+    The labels of a review without priors, see `synthetic_order`.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of labels (0 or 1) of type uint8 in screening order.
+    """
+    labels, order, _ = synthetic_order(
+        n_records, prevalence=prevalence, n_priors=0, effect=effect, seed=seed
+    )
+    return labels[order]
+
+
+def synthetic_label_matrix(n_runs, n_records, prevalence, effect=2.0, seed=None):
+    """Generate the labels of multiple runs on the same dataset."""
+    rng = np.random.default_rng(seed)
+
+    return np.stack(
+        [
+            synthetic_labels(n_records, prevalence, effect=effect, seed=rng)
+            for _ in range(n_runs)
+        ]
+    )
+
+
+def measure(func, repeat=3):
+    """Measure the best wall time of a function and its peak memory.
+
+    The wall time is measured without tracemalloc, as tracing the memory slows
+    down the function. The peak memory is measured in a separate call.
+
+    Returns
+    -------
+    tuple[float, int]
+        The best wall time in seconds and the peak of the traced memory in
+        bytes.
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return min(times), peak
+
+
+def _draw_plot(plot_func, *args, **kwargs):
+    fig, ax = plt.subplots()
+    try:
+        plot_func(ax, *args, **kwargs)
+        fig.canvas.draw()
+    finally:
+        plt.close(fig)
+
+
+def _run_metrics_entry_point(fp):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            MetricsEntryPoint().execute(
+                [str(fp), "--quiet", "--no-cache", "-o", str(Path(tmpdir, "m.json"))]
+            )
+
+
+def _make_asreview_files(tmpdir, file_sizes, prevalence):
+    """Write a synthetic ASReview file for each size."""
+    asreview_files = []
+    for n_records in file_sizes:
+        fp = Path(tmpdir, f"synthetic_{n_records}.asreview")
+        make_asreview_file(fp, n_records, prevalence=prevalence, seed=535)
+        asreview_files.append(fp)
+
+    return asreview_files
+
+
+def _benchmarks(sizes, prevalences, n_runs, asreview_files):
+    """Yield the name, the case and the function of each benchmark."""
+    for n_records in sizes:
+        for prevalence in prevalences:
+            case = f"n={n_records} p={prevalence}"
+            labels = synthetic_labels(n_records, prevalence, seed=535)
+
+            # every call gets a fresh array, so the curves are not cached
+            for name, func in CURVE_FUNCS.items():
+                yield name, case, lambda f=func, labels=labels: f(labels.copy())
+
+            for name, func in PLOT_FUNCS.items():
+                yield (
+                    name,
+                    case,
+                    lambda f=func, labels=labels: _draw_plot(f, labels.copy()),
+                )
+
+        if n_runs > 1:
+            case = f"n={n_records} p={prevalences[0]} runs={n_runs}"
+            label_matrix = synthetic_label_matrix(
+                n_runs, n_records, prevalences[0], seed=535
+            )
+
+            for name, func in MATRIX_FUNCS.items():
+                yield name, case, lambda f=func, m=label_matrix: f(LabelMatrix(m))
+
+            yield (
+                "_plot_recall(aggregate)",
+                case,
+                lambda m=label_matrix: _draw_plot(_plot_recall, m, aggregate=True),
+            )
+
+    for fp in asreview_files:
+        case = Path(fp).name
+        yield "get_simulation_labels", case, lambda fp=fp: get_simulation_labels(fp)
+        yield "get_metrics", case, lambda fp=fp: get_metrics(fp)
+
+        yield "MetricsEntryPoint", case, lambda fp=fp: _run_metrics_entry_point(fp)
+
+        for name, func in PLOT_FILE_FUNCS.items():
+            yield name, case, lambda f=func, fp=fp: _draw_plot(f, fp)
+
+
+def run_benchmarks(
+    sizes=None, prevalences=None, n_runs=10, asreview_files=None, repeat=3, out=None
+):
+    """Run the benchmarks and print a line for each benchmark.
+
+    Returns
+    -------
+    list[dict]
+        The name, case, best wall time (s) and peak memory (bytes) of each
+        benchmark.
+    """
+    sizes = DEFAULT_SIZES if sizes is None else sizes
+    prevalences = DEFAULT_PREVALENCES if prevalences is None else prevalences
+    if asreview_files is None:
+        asreview_files = sorted(TEST_ASREVIEW_FILES.glob("*.asreview"))
+    out = sys.stdout if out is None else out
+
+    results = []
+    print(
+        f"{'benchmark':<28} {'case':<36} {'time (ms)':>12} {'peak (MB)':>10}", file=out
+    )
+    for name, case, func in _benchmarks(sizes, prevalences, n_runs, asreview_files):
+        seconds, peak = measure(func, repeat=repeat)
+        results.append({"name": name, "case": case, "time": seconds, "peak": peak})
+        print(
+            f"{name:<28} {case:<36} {seconds * 1000:>12.2f} {peak / 2**20:>10.2f}",
+            file=out,
+            flush=True,
+        )
+
+    return results
+
+
+def compare(results, baseline, tolerance=1.5, out=None):
+    """Compare the results with a baseline and report the regressions.
+
+    A benchmark regresses if the time or the peak memory is more than
+    `tolerance` times the value in the baseline.
+
+    Returns
+    -------
+    list[str]
+        A description of each regression.
+    """
+    out = sys.stdout if out is None else out
+    baseline = {(b["name"], b["case"]): b for b in baseline}
+
+    regressions = []
+    for result in results:
+        base = baseline.get((result["name"], result["case"]))
+        if base is None:
+            continue
+
+        for key in ["time", "peak"]:
+            if base[key] > 0 and result[key] > tolerance * base[key]:
+                regressions.append(
+                    f"{result['name']} ({result['case']}): {key} "
+                    f"{result[key] / base[key]:.2f}x the baseline"
+                )
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=out)
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="bench_insights",
+        description="Time the metrics and plotting hot paths of asreview-insights.",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="Numbers of records of the synthetic reviews.",
+    )
+    parser.add_argument(
+        "--prevalences",
+        type=float,
+        nargs="+",
+        default=DEFAULT_PREVALENCES,
+        help="Fractions of relevant records of the synthetic reviews.",
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=10,
+        help="Number of runs for the benchmarks of many runs. Use 1 to skip them.",
+    )
+    parser.add_argument(
+        "--asreview-files",
+        nargs="*",
+        default=None,
+        help="ASReview files for the benchmarks that read files. By default, the "
+        "files in tests/asreview_files.",
+    )
+    parser.add_argument(
+        "--file-sizes",
+        type=int,
+        nargs="*",
+        default=[],
+        help="Numbers of records of synthetic ASReview files to add to the "
+        "benchmarks that read files, for example 100000 1000000.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Number of timed calls. Default 3."
+    )
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="Only run the benchmarks with 1,000 and 10,000 records.",
+    )
+    parser.add_argument("-o", "--output", help="Save the results to a JSON file.")
+    parser.add_argument(
+        "--baseline",
+        help="JSON file with the results of an earlier run. Exit with status 1 "
+        "if a benchmark is slower or uses more memory than the baseline.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="Allowed ratio to the baseline before reporting a regression. "
+        "Default 1.5.",
+    )
+    args = parser.parse_args(argv)
+
+    sizes = [n for n in args.sizes if n <= 10_000] if args.quick else args.sizes
+    with tempfile.TemporaryDirectory() as tmpdir:
+        asreview_files = args.asreview_files
+        if args.file_sizes:
+            if asreview_files is None:
+                asreview_files = sorted(TEST_ASREVIEW_FILES.glob("*.asreview"))
+            asreview_files = asreview_files + _make_asreview_files(
+                tmpdir, args.file_sizes, args.prevalences[0]
+            )
+
+        results = run_benchmarks(
+            sizes=sizes,
+            prevalences=args.prevalences,
+            n_runs=args.runs,
+            asreview_files=asreview_files,
+            repeat=args.repeat,
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, tolerance=args.tolerance):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
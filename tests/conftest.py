@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def label_cache_dir(tmp_path, monkeypatch):
+    """Keep the label cache of the command line tools out of the user cache."""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("ASREVIEW_INSIGHTS_CACHE_DIR", str(cache_dir))
+    return cache_dir
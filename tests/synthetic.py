@@ -0,0 +1,251 @@
+"""Generate synthetic ASReview files for tests and benchmarks.
+
+The files are written directly, without training any model: the labels and the
+screening order are generated at random. Only the parts of a project that are
+read by asreview-insights are written, that is the project configuration, the
+records in the data store and the results of a single review.
+
+Usage:
+
+    python tests/synthetic.py sim_100k.asreview --n-records 100000
+
+See `python tests/synthetic.py -h` for all options.
+"""
+
+import argparse
+import json
+import sqlite3
+import tempfile
+import time
+import uuid
+import zipfile
+from pathlib import Path
+
+import asreview
+import numpy as np
+from asreview.data.store import DataStore
+from asreview.state.sqlstate import SQLiteState
+
+
+def synthetic_order(
+    n_records, prevalence=0.05, n_priors=2, effect=2.0, stop_if=None, seed=None
+):
+    """Generate the labels and the screening order of a simulated review.
+
+    The relevant records get a score from a normal distribution shifted by
+    `effect`, the irrelevant records from a standard normal distribution. After
+    the prior records, the records are screened in the order of decreasing
+    score, so a larger effect finds the relevant records earlier. With
+    `effect=0`, the order is random.
+
+    Parameters
+    ----------
+    n_records : int
+        Number of records.
+    prevalence : float
+        Fraction of relevant records, at least one record is relevant.
+    n_priors : int
+        Number of prior records. Half of the priors (rounded up) are relevant,
+        the other half irrelevant.
+    effect : float
+        Shift of the scores of the relevant records.
+    stop_if : None | str | int
+        Stop screening after all records (None), after the last relevant
+        record ("min"), or after the given number of records, priors
+        included.
+    seed : int | numpy.random.Generator, optional
+        Seed of the random number generator.
+
+    Returns
+    -------
+    tuple[numpy.ndarray, numpy.ndarray, int]
+        The labels of all records (ordered by record id), the record ids in
+        screening order, and the number of prior records.
+    """
+    rng = np.random.default_rng(seed)
+
+    n_pos = max(1, round(n_records * prevalence))
+    labels = np.zeros(n_records, dtype=np.uint8)
+    labels[rng.choice(n_records, n_pos, replace=False)] = 1
+
+    relevant = np.flatnonzero(labels == 1)
+    irrelevant = np.flatnonzero(labels == 0)
+    n_prior_pos = min(n_pos, (n_priors + 1) // 2)
+    n_prior_neg = min(len(irrelevant), n_priors - n_prior_pos)
+    priors = np.concatenate(
+        [
+            rng.choice(relevant, n_prior_pos, replace=False),
+            rng.choice(irrelevant, n_prior_neg, replace=False),
+        ]
+    ).astype(np.int64)
+
+    is_prior = np.zeros(n_records, dtype=bool)
+    is_prior[priors] = True
+    others = np.flatnonzero(~is_prior)
+    scores = rng.standard_normal(len(others)) + effect * labels[others]
+    order = np.concatenate([priors, others[np.argsort(-scores, kind="stable")]])
+
+    if stop_if == "min":
+        order = order[: np.flatnonzero(labels[order] == 1)[-1] + 1]
+    elif stop_if is not None:
+        order = order[: max(int(stop_if), len(priors))]
+
+    return labels, order, len(priors)
+
+
+def _write_data_store(fp, labels):
+    data_store = DataStore(fp)
+    data_store.create_tables()
+    data_store.engine.dispose()
+
+    with sqlite3.connect(fp) as con:
+        con.executemany(
+            "INSERT INTO record (dataset_row, dataset_id, title, abstract, "
+            "authors, keywords, included, record_id) "
+            "VALUES (?, 'data.csv', ?, '', '[]', '[]', ?, ?)",
+            (
+                (i, f"Record {i}", int(label), i)
+                for i, label in enumerate(labels.tolist())
+            ),
+        )
+    con.close()
+
+
+def _results_rows(labels, order, n_priors):
+    start = time.time()
+    for i, record_id in enumerate(order.tolist()):
+        if i < n_priors:
+            model = (None, None, None, None, None)
+        else:
+            model = ("nb", "max", "balanced", "tfidf", i)
+        yield (record_id, int(labels[record_id]), *model, start + i * 1e-3)
+
+
+def _write_results(fp, labels, order, n_priors):
+    state = SQLiteState(fp)
+    state.create_tables()
+    state.close()
+
+    with sqlite3.connect(fp) as con:
+        con.executemany(
+            "INSERT INTO results (record_id, label, classifier, querier, balancer, "
+            "feature_extractor, training_set, time) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            _results_rows(labels, order, n_priors),
+        )
+    con.close()
+
+
+def make_asreview_file(
+    fp,
+    n_records,
+    prevalence=0.05,
+    n_priors=2,
+    effect=2.0,
+    stop_if=None,
+    seed=None,
+):
+    """Write a synthetic ASReview file of a simulation.
+
+    Parameters
+    ----------
+    fp : str | Path
+        Path of the ASReview file to write.
+    n_records : int
+        Number of records.
+    prevalence : float
+        Fraction of relevant records.
+    n_priors : int
+        Number of prior records.
+    effect : float
+        Shift of the scores of the relevant records, a larger effect finds the
+        relevant records earlier.
+    stop_if : None | str | int
+        Stop screening after all records (None), after the last relevant
+        record ("min"), or after the given number of records.
+    seed : int, optional
+        Seed of the random number generator.
+
+    Returns
+    -------
+    tuple[numpy.ndarray, numpy.ndarray, int]
+        The labels of all records, the record ids in screening order, and the
+        number of prior records, see `synthetic_order`.
+    """
+    labels, order, n_priors = synthetic_order(
+        n_records,
+        prevalence=prevalence,
+        n_priors=n_priors,
+        effect=effect,
+        stop_if=stop_if,
+        seed=seed,
+    )
+
+    review_id = uuid.uuid4().hex
+    project_config = {
+        "version": asreview.__version__,
+        "id": Path(fp).stem,
+        "mode": "simulate",
+        "name": Path(fp).stem,
+        "created_at_unix": int(time.time()),
+        "reviews": [{"id": review_id, "status": "finished"}],
+        "feature_matrices": [],
+        "tags": None,
+        "datasets": [{"id": "data.csv", "name": "data.csv"}],
+    }
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        Path(tmpdir, "reviews", review_id).mkdir(parents=True)
+        Path(tmpdir, "project.json").write_text(json.dumps(project_config))
+        _write_data_store(Path(tmpdir, "data_store.db"), labels)
+        _write_results(
+            Path(tmpdir, "reviews", review_id, "results.db"), labels, order, n_priors
+        )
+
+        with zipfile.ZipFile(fp, "w", zipfile.ZIP_DEFLATED) as archive:
+            for member in sorted(Path(tmpdir).rglob("*")):
+                archive.write(member, member.relative_to(tmpdir))
+
+    return labels, order, n_priors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="synthetic", description="Write a synthetic ASReview file."
+    )
+    parser.add_argument("output", help="Path of the ASReview file to write.")
+    parser.add_argument("--n-records", type=int, default=10_000)
+    parser.add_argument("--prevalence", type=float, default=0.05)
+    parser.add_argument("--n-priors", type=int, default=2)
+    parser.add_argument(
+        "--effect",
+        type=float,
+        default=2.0,
+        help="Shift of the scores of the relevant records. Use 0 for a random "
+        "screening order. Default 2.",
+    )
+    parser.add_argument(
+        "--stop-if",
+        default=None,
+        help="Stop after the last relevant record ('min') or after a number of "
+        "records. By default, all records are screened.",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    stop_if = args.stop_if
+    if stop_if is not None and stop_if != "min":
+        stop_if = int(stop_if)
+
+    make_asreview_file(
+        args.output,
+        args.n_records,
+        prevalence=args.prevalence,
+        n_priors=args.n_priors,
+        effect=args.effect,
+        stop_if=stop_if,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import numpy as np
+from numpy import array_equal
+from numpy.testing import assert_raises
+
+from asreviewcontrib.insights.algorithms import LabelMatrix
+from asreviewcontrib.insights.algorithms import _loss_value
+from asreviewcontrib.insights.bootstrap import bootstrap_ci
+from asreviewcontrib.insights.bootstrap import bootstrap_metrics
+from asreviewcontrib.insights.bootstrap import get_bootstrap_metrics
+from asreviewcontrib.insights.metrics import get_metrics
+
+TEST_ASREVIEW_FILES = Path(Path(__file__).parent, "asreview_files")
+
+
+def _label_matrix(n_runs, n_docs, n_pos_docs, seed=None):
+    rng = np.random.default_rng(seed)
+    labels = np.zeros((n_runs, n_docs), dtype=np.uint8)
+    for row in labels:
+        row[rng.choice(n_docs, n_pos_docs, replace=False)] = 1
+    return LabelMatrix(labels)
+
+
+def test_bootstrap_ci():
+    values = np.random.default_rng(0).normal(size=(40, 3))
+
+    mean, lower, upper = bootstrap_ci(values, n_resamples=2500, seed=1)
+    assert array_equal(mean, values.mean(axis=0))
+    assert (lower < mean).all() and (mean < upper).all()
+
+    # each column equals the interval of the column alone
+    column = bootstrap_ci(values[:, 1], n_resamples=2500, seed=1)
+    assert np.allclose(column, (mean[1], lower[1], upper[1]))
+
+    # the intervals do not depend on the number of jobs
+    parallel = bootstrap_ci(values, n_resamples=2500, seed=1, n_jobs=2)
+    assert all(
+        array_equal(a, b) for a, b in zip(parallel, (mean, lower, upper), strict=True)
+    )
+
+    # a wider interval for a higher confidence
+    _, lower_99, upper_99 = bootstrap_ci(values, 2500, confidence=0.99, seed=1)
+    assert (lower_99 <= lower).all() and (upper <= upper_99).all()
+
+    # constant values have an empty interval
+    assert bootstrap_ci([0.5] * 10, seed=0) == (0.5, 0.5, 0.5)
+
+    with assert_raises(ValueError):
+        bootstrap_ci([])
+    with assert_raises(ValueError):
+        bootstrap_ci(values, confidence=1)
+
+
+def test_bootstrap_metrics():
+    label_matrix = _label_matrix(30, 200, 10, seed=0)
+
+    stats = bootstrap_metrics(label_matrix, recall=[0.1, 0.5], seed=0)
+    items = {item["id"]: item["value"] for item in stats["data"]["items"]}
+
+    assert stats["nRuns"] == 30
+    assert [i for i, _ in items["recall"]] == [0.1, 0.5]
+    assert set(items) == {"recall", "wss", "erf", "loss", "atd"}
+    for ci in [items["loss"], items["atd"], *(v for _, v in items["recall"])]:
+        assert ci["lower"] <= ci["mean"] <= ci["upper"]
+
+    # the mean over the label matrix equals the mean of the metrics of the runs
+    losses = [_loss_value(np.diff(tp, prepend=0)) for tp in label_matrix.tp]
+    assert np.isclose(items["loss"]["mean"], np.mean(losses))
+
+
+def test_get_bootstrap_metrics():
+    asreview_files = sorted(TEST_ASREVIEW_FILES.glob("*.asreview"))
+
+    stats = get_bootstrap_metrics(asreview_files, wss=[0.95], seed=0)
+    all_stats = [get_metrics(fp) for fp in asreview_files]
+
+    items = {item["id"]: item["value"] for item in stats["data"]["items"]}
+    losses = [
+        item["value"]
+        for s in all_stats
+        for item in s["data"]["items"]
+        if item["id"] == "loss"
+    ]
+    assert stats["nRuns"] == len(asreview_files)
+    assert np.isclose(items["loss"]["mean"], np.mean(losses))
+    assert items["loss"]["lower"] >= min(losses)
+    assert items["loss"]["upper"] <= max(losses)
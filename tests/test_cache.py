@@ -0,0 +1,109 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+from numpy.testing import assert_array_equal
+
+from asreviewcontrib.insights.cache import LabelCache
+from asreviewcontrib.insights.entrypoint import MetricsEntryPoint
+from asreviewcontrib.insights.utils import get_simulation_labels
+from asreviewcontrib.insights.utils import read_simulation_results
+
+TEST_ASREVIEW_FILES = Path(Path(__file__).parent, "asreview_files")
+
+
+def test_cache_results(tmp_path):
+    fp = Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_stop_if_min.asreview")
+    cache = LabelCache(tmp_path)
+
+    assert cache.get(fp) is None
+
+    results = read_simulation_results(fp, cache=cache)
+    cached_results = cache.get(fp)
+
+    assert cached_results.n_records == results.n_records
+    assert_array_equal(cached_results.record_ids, results.record_ids)
+    assert_array_equal(cached_results.labels, results.labels)
+    assert_array_equal(cached_results.is_prior, results.is_prior)
+    assert get_simulation_labels(fp, cache=cache) == get_simulation_labels(fp)
+
+
+def test_cache_modified_file(tmp_path):
+    fp = Path(tmp_path, "project.asreview")
+    shutil.copy(
+        Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_stop_if_min.asreview"), fp
+    )
+    cache = LabelCache(Path(tmp_path, "cache"))
+    read_simulation_results(fp, cache=cache)
+
+    stat = fp.stat()
+    os.utime(fp, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert cache.get(fp) is None
+
+
+def test_cache_eviction(tmp_path):
+    fps = [
+        Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_stop_if_min.asreview"),
+        Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_logistic.asreview"),
+    ]
+    cache = LabelCache(tmp_path, max_size=1)
+
+    for fp in fps:
+        read_simulation_results(fp, cache=cache)
+
+    assert len(list(tmp_path.glob("*.npz"))) == 0
+
+    cache.max_size = 10**6
+    for fp in fps:
+        read_simulation_results(fp, cache=cache)
+
+    assert len(list(tmp_path.glob("*.npz"))) == 2
+
+    cache.clear()
+    assert len(list(tmp_path.glob("*.npz"))) == 0
+
+
+def test_cache_cli(label_cache_dir):
+    fp = str(Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_stop_if_min.asreview"))
+
+    MetricsEntryPoint().execute([fp, "--quiet", "--no-cache"])
+    assert not label_cache_dir.exists()
+
+    MetricsEntryPoint().execute([fp, "--quiet"])
+    assert len(list(label_cache_dir.glob("*.npz"))) == 1
+
+    MetricsEntryPoint().execute([fp, "--quiet", "--no-cache", "--clear-cache"])
+    assert len(list(label_cache_dir.glob("*.npz"))) == 0
+
+
+def test_cache_not_writable(tmp_path, monkeypatch):
+    fp = str(Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_stop_if_min.asreview"))
+
+    # a cache directory below a regular file cannot be created
+    Path(tmp_path, "afile").touch()
+    cache_dir = Path(tmp_path, "afile", "cache")
+    monkeypatch.setenv("ASREVIEW_INSIGHTS_CACHE_DIR", str(cache_dir))
+
+    with pytest.warns(UserWarning, match="Could not store"):
+        results = read_simulation_results(fp, cache=LabelCache(cache_dir))
+    assert_array_equal(results.labels, read_simulation_results(fp).labels)
+
+    with pytest.warns(UserWarning):
+        MetricsEntryPoint().execute([fp, "--quiet", "--clear-cache"])
+
+
+@pytest.mark.parametrize("content", [b"", b"not a zip file"])
+def test_cache_corrupt_entry(tmp_path, content):
+    fp = Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_stop_if_min.asreview")
+    cache = LabelCache(tmp_path)
+
+    # a truncated or corrupt entry is a cache miss and is removed
+    entry = cache._entry_path(fp)
+    entry.write_bytes(content)
+    assert cache.get(fp) is None
+    assert not entry.exists()
+
+    results = read_simulation_results(fp, cache=cache)
+    assert_array_equal(cache.get(fp).labels, results.labels)
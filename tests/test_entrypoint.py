@@ -0,0 +1,359 @@
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from asreviewcontrib.insights.entrypoint import MetricsEntryPoint
+from asreviewcontrib.insights.entrypoint import PlotEntryPoint
+
+TEST_ASREVIEW_FILES = Path(Path(__file__).parent, "asreview_files")
+
+ASREVIEW_FILES = [
+    str(Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_stop_if_min.asreview")),
+    str(Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_logistic.asreview")),
+    str(Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_stop_if_full.asreview")),
+]
+
+
+def test_metrics_parallel(tmp_path):
+    fp_serial = Path(tmp_path, "serial.json")
+    fp_parallel = Path(tmp_path, "parallel.json")
+
+    MetricsEntryPoint().execute([*ASREVIEW_FILES, "--quiet", "-o", str(fp_serial)])
+    MetricsEntryPoint().execute(
+        [*ASREVIEW_FILES, "--quiet", "-o", str(fp_parallel), "--jobs", "2"]
+    )
+
+    with open(fp_serial) as f_serial, open(fp_parallel) as f_parallel:
+        serial = json.load(f_serial)
+        parallel = json.load(f_parallel)
+
+    assert list(parallel) == ASREVIEW_FILES
+    assert parallel == serial
+
+
+@pytest.mark.parametrize("jobs", ["0", "-2"])
+def test_metrics_jobs_invalid(jobs, capsys):
+    with pytest.raises(SystemExit):
+        MetricsEntryPoint().execute([*ASREVIEW_FILES, "--quiet", "-j", jobs])
+
+    assert "--jobs" in capsys.readouterr().err
+
+
+def test_metrics_jsonl(tmp_path):
+    fp_json = Path(tmp_path, "metrics.json")
+    fp_jsonl = Path(tmp_path, "metrics.jsonl")
+
+    MetricsEntryPoint().execute([*ASREVIEW_FILES, "--quiet", "-o", str(fp_json)])
+    MetricsEntryPoint().execute([*ASREVIEW_FILES, "--quiet", "-o", str(fp_jsonl)])
+
+    with open(fp_json) as f:
+        stats = json.load(f)
+    with open(fp_jsonl) as f:
+        lines = [json.loads(line) for line in f]
+
+    assert [line.pop("file") for line in lines] == ASREVIEW_FILES
+    for line in lines:
+        del line["fileModified"], line["parameters"]
+    assert lines == [stats[fp] for fp in ASREVIEW_FILES]
+
+
+def test_metrics_resume(tmp_path, capsys):
+    asreview_files = []
+    for fp in ASREVIEW_FILES:
+        asreview_files.append(str(Path(tmp_path, Path(fp).name)))
+        shutil.copy(fp, asreview_files[-1])
+    fp_jsonl = Path(tmp_path, "metrics.jsonl")
+
+    MetricsEntryPoint().execute([*asreview_files, "--quiet", "-o", str(fp_jsonl)])
+    with open(fp_jsonl) as f:
+        lines = [json.loads(line) for line in f]
+
+    # modify a file and interrupt while writing a line
+    os.utime(asreview_files[1], ns=(0, 0))
+    with open(fp_jsonl, "a") as f:
+        f.write('{"file": ')
+
+    capsys.readouterr()
+    MetricsEntryPoint().execute(
+        [*asreview_files, "--quiet", "-o", str(fp_jsonl), "--resume"]
+    )
+    assert "Skipping 2 files" in capsys.readouterr().out
+
+    with open(fp_jsonl) as f:
+        lines_resumed = [json.loads(line) for line in f]
+
+    assert [line["file"] for line in lines_resumed] == [
+        asreview_files[0],
+        asreview_files[2],
+        asreview_files[1],
+    ]
+    assert lines_resumed[2]["fileModified"] == 0
+    assert lines_resumed[2]["data"] == lines[1]["data"]
+
+    # other parameters compute all files again
+    MetricsEntryPoint().execute(
+        [*asreview_files, "--quiet", "-o", str(fp_jsonl), "--resume", "--priors"]
+    )
+    assert "Skipping 0 files" in capsys.readouterr().out
+
+
+def test_metrics_csv(tmp_path):
+    fp_json = Path(tmp_path, "metrics.json")
+    MetricsEntryPoint().execute(
+        [*ASREVIEW_FILES, "--quiet", "-o", str(fp_json), "--csv", str(tmp_path)]
+    )
+
+    with open(fp_json) as f:
+        stats = json.load(f)
+    with open(Path(tmp_path, "metrics.csv")) as f:
+        metric_rows = list(csv.DictReader(f))
+    with open(Path(tmp_path, "td.csv")) as f:
+        td_rows = list(csv.DictReader(f))
+
+    for fp in ASREVIEW_FILES:
+        items = {item["id"]: item["value"] for item in stats[fp]["data"]["items"]}
+
+        recall = [
+            row for row in metric_rows if (row["file"], row["metric"]) == (fp, "recall")
+        ]
+        assert [
+            [float(row["intercept"]), float(row["value"])] for row in recall
+        ] == items["recall"]
+
+        (loss,) = [
+            row for row in metric_rows if (row["file"], row["metric"]) == (fp, "loss")
+        ]
+        assert loss["intercept"] == ""
+        assert float(loss["value"]) == items["loss"]
+
+        td = [
+            [int(row["record_id"]), int(row["time_to_discovery"])]
+            for row in td_rows
+            if row["file"] == fp
+        ]
+        assert td == items["td"]
+
+
+def test_plot_parallel(tmp_path):
+    fp = Path(tmp_path, "recall.png")
+    PlotEntryPoint().execute(["recall", *ASREVIEW_FILES, "-o", str(fp), "-j", "2"])
+
+    assert fp.is_file()
+
+
+@pytest.mark.parametrize("jobs", ["0", "-2"])
+def test_plot_jobs_invalid(jobs, capsys):
+    with pytest.raises(SystemExit):
+        PlotEntryPoint().execute(["recall", *ASREVIEW_FILES, "-j", jobs])
+
+    assert "--jobs" in capsys.readouterr().err
+
+
+def test_plot_aggregate(tmp_path):
+    fp = Path(tmp_path, "recall.png")
+    PlotEntryPoint().execute(
+        ["recall", *ASREVIEW_FILES[:2], "-o", str(fp), "--aggregate", "median"]
+    )
+
+    assert fp.is_file()
+
+
+def test_timings(tmp_path, capsys):
+    fp = Path(tmp_path, "metrics.json")
+    MetricsEntryPoint().execute(
+        [*ASREVIEW_FILES, "--quiet", "-o", str(fp), "--timings", "-j", "2"]
+    )
+    assert "compute" in capsys.readouterr().out
+
+    with open(Path(tmp_path, "metrics.json.timings.json")) as f:
+        records = json.load(f)
+    assert [(r["file"], r["stage"]) for r in records] == [
+        *(
+            (fp, stage)
+            for fp in ASREVIEW_FILES
+            for stage in ["load", "compute", "output"]
+        ),
+        (None, "output"),
+    ]
+    assert all(r["time"] >= 0 and r["peak"] > 0 for r in records)
+
+    fp = Path(tmp_path, "recall.png")
+    PlotEntryPoint().execute(["recall", *ASREVIEW_FILES, "-o", str(fp), "--profile"])
+    with open(Path(tmp_path, "recall.png.timings.json")) as f:
+        records = json.load(f)
+    assert [r["stage"] for r in records] == ["load"] * len(ASREVIEW_FILES) + [
+        "plot",
+        "save",
+    ]
+
+    # files loaded in parallel threads are measured as a single stage
+    PlotEntryPoint().execute(
+        ["recall", *ASREVIEW_FILES, "-o", str(fp), "--timings", "-j", "2"]
+    )
+    with open(Path(tmp_path, "recall.png.timings.json")) as f:
+        records = json.load(f)
+    assert [(r["file"], r["stage"]) for r in records] == [
+        (None, "load"),
+        (None, "plot"),
+        (None, "save"),
+    ]
+
+
+def test_metrics_startup():
+    # the metrics command should not import matplotlib or the plot module
+    code = (
+        "import sys\n"
+        "from asreviewcontrib.insights.entrypoint import MetricsEntryPoint\n"
+        f"MetricsEntryPoint().execute([{ASREVIEW_FILES[0]!r}, '--quiet'])\n"
+        "import asreviewcontrib.insights\n"
+        "assert 'matplotlib' not in sys.modules, 'matplotlib'\n"
+        "assert 'asreviewcontrib.insights.plot' not in sys.modules, 'plot'\n"
+        "assert callable(asreviewcontrib.insights.plot_recall)\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_metrics_bootstrap(tmp_path):
+    fp = Path(tmp_path, "metrics.json")
+
+    MetricsEntryPoint().execute(
+        [*ASREVIEW_FILES, "--quiet", "-o", str(fp), "--bootstrap", "500"]
+    )
+
+    with open(Path(tmp_path, "metrics.json.bootstrap.json")) as f:
+        stats = json.load(f)
+
+    assert stats["nRuns"] == len(ASREVIEW_FILES)
+    assert stats["nResamples"] == 500
+    assert [item["id"] for item in stats["data"]["items"]] == [
+        "recall",
+        "wss",
+        "loss",
+        "erf",
+        "atd",
+    ]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        ["--bootstrap", "0"],
+        ["--bootstrap", "-5"],
+        ["--bootstrap", "500", "--confidence", "0"],
+        ["--bootstrap", "500", "--confidence", "1.5"],
+    ],
+)
+def test_metrics_bootstrap_invalid(options, capsys):
+    with pytest.raises(SystemExit):
+        MetricsEntryPoint().execute([*ASREVIEW_FILES, "--quiet", *options])
+
+    assert "error" in capsys.readouterr().err
+
+
+def test_metrics_watch(tmp_path, capsys):
+    fp = Path(tmp_path, "metrics.jsonl")
+
+    MetricsEntryPoint().execute(
+        [*ASREVIEW_FILES, "--quiet", "-o", str(fp), "--watch", "0", "--polls", "2"]
+    )
+
+    with open(fp) as f:
+        lines = [json.loads(line) for line in f]
+
+    # the files did not change after the first poll
+    assert [line["file"] for line in lines] == ASREVIEW_FILES
+    assert capsys.readouterr().out.count("Updated metrics") == len(ASREVIEW_FILES)
+
+    # a restarted watch appends to the history
+    MetricsEntryPoint().execute(
+        [*ASREVIEW_FILES, "--quiet", "-o", str(fp), "--watch", "0", "--polls", "1"]
+    )
+    with open(fp) as f:
+        lines = [json.loads(line) for line in f]
+    assert [line["file"] for line in lines] == ASREVIEW_FILES * 2
+
+
+def test_plot_multiple_types(tmp_path, capsys):
+    fp = Path(tmp_path, "plot.png")
+    PlotEntryPoint().execute(["all", *ASREVIEW_FILES, "-o", str(fp), "--timings"])
+
+    assert fp.is_file()
+    with open(Path(tmp_path, "plot.png.timings.json")) as f:
+        records = json.load(f)
+    # the files are loaded once for all plot types
+    assert [r["stage"] for r in records] == ["load"] * len(ASREVIEW_FILES) + [
+        "plot",
+        "plot",
+        "plot",
+        "save",
+    ]
+
+    PlotEntryPoint().execute(
+        ["recall,erf", *ASREVIEW_FILES, "-o", str(fp), "--layout", "separate"]
+    )
+    assert Path(tmp_path, "plot_recall.png").is_file()
+    assert Path(tmp_path, "plot_erf.png").is_file()
+    assert not Path(tmp_path, "plot_wss.png").exists()
+
+
+def test_plot_per_file(tmp_path, capsys):
+    template = str(Path(tmp_path, "figures", "{stem}_{type}.png"))
+    PlotEntryPoint().execute(
+        ["recall", *ASREVIEW_FILES, "--per-file", "-o", template, "-j", "2"]
+    )
+
+    for fp in ASREVIEW_FILES:
+        assert Path(tmp_path, "figures", f"{Path(fp).stem}_recall.png").is_file()
+    assert capsys.readouterr().out.count("Saved") == len(ASREVIEW_FILES)
+
+    template = str(Path(tmp_path, "{stem}.png"))
+    PlotEntryPoint().execute(
+        [
+            "wss,erf",
+            *ASREVIEW_FILES[:1],
+            "--per-file",
+            "-o",
+            template,
+            "--layout",
+            "separate",
+        ]
+    )
+    stem = Path(ASREVIEW_FILES[0]).stem
+    assert Path(tmp_path, f"{stem}_wss.png").is_file()
+    assert Path(tmp_path, f"{stem}_erf.png").is_file()
+
+
+def test_metrics_resume_csv(tmp_path):
+    fp_jsonl = Path(tmp_path, "metrics.jsonl")
+    dir_csv = Path(tmp_path, "tables")
+
+    MetricsEntryPoint().execute(
+        [*ASREVIEW_FILES, "--quiet", "-o", str(fp_jsonl), "--csv", str(dir_csv)]
+    )
+    tables = {}
+    for name in ["metrics.csv", "td.csv"]:
+        with open(Path(dir_csv, name), newline="") as f:
+            tables[name] = sorted(map(tuple, csv.reader(f)))
+
+    # the tables have the rows of the skipped files too
+    MetricsEntryPoint().execute(
+        [
+            *ASREVIEW_FILES,
+            "--quiet",
+            "-o",
+            str(fp_jsonl),
+            "--csv",
+            str(dir_csv),
+            "--resume",
+        ]
+    )
+    for name, rows in tables.items():
+        with open(Path(dir_csv, name), newline="") as f:
+            assert sorted(map(tuple, csv.reader(f))) == rows
+        assert len(rows) > 1
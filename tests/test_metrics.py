@@ -1,3 +1,4 @@
+import itertools
 from pathlib import Path
 
 import numpy as np
@@ -5,14 +6,34 @@ from numpy import array_equal
 from numpy.testing import assert_almost_equal
 from numpy.testing import assert_raises
 
+from asreviewcontrib.insights import metrics
+from asreviewcontrib.insights.algorithms import LabelMatrix
+from asreviewcontrib.insights.algorithms import LabelSet
+from asreviewcontrib.insights.algorithms import _as_lists
+from asreviewcontrib.insights.algorithms import _erf_matrix_values
+from asreviewcontrib.insights.algorithms import _erf_values
+from asreviewcontrib.insights.algorithms import _fn_values
+from asreviewcontrib.insights.algorithms import _fp_values
+from asreviewcontrib.insights.algorithms import _loss_matrix_values
 from asreviewcontrib.insights.algorithms import _loss_value
+from asreviewcontrib.insights.algorithms import _recall_matrix_values
+from asreviewcontrib.insights.algorithms import _recall_values
+from asreviewcontrib.insights.algorithms import _td_matrix_values
+from asreviewcontrib.insights.algorithms import _tn_values
+from asreviewcontrib.insights.algorithms import _tp_values
+from asreviewcontrib.insights.algorithms import _wss_matrix_values
+from asreviewcontrib.insights.algorithms import _wss_values
 from asreviewcontrib.insights.metrics import _erf
 from asreviewcontrib.insights.metrics import _recall
 from asreviewcontrib.insights.metrics import _time_to_discovery
+from asreviewcontrib.insights.metrics import _tn
+from asreviewcontrib.insights.metrics import _tnr
+from asreviewcontrib.insights.metrics import _tp
 from asreviewcontrib.insights.metrics import _wss
 from asreviewcontrib.insights.metrics import get_metrics
 from asreviewcontrib.insights.metrics import loss
 from asreviewcontrib.insights.metrics import recall
+from asreviewcontrib.insights.metrics import time_to_discovery
 
 TEST_ASREVIEW_FILES = Path(Path(__file__).parent, "asreview_files")
 
@@ -80,6 +101,161 @@ def test_metric_recall_invalid_values_max():
     assert_almost_equal(r, 1)
 
 
+def test_label_set():
+    labels = [1, 0, 1, 1, 0, 0]
+    label_set = LabelSet(labels)
+
+    assert label_set.n_docs == 6
+    assert label_set.n_pos_docs == 3
+    assert label_set.n_neg_docs == 3
+    assert label_set.positions.tolist() == [0, 2, 3]
+    assert label_set.tp.tolist() == [1, 1, 2, 3, 3, 3]
+    assert label_set.fp.tolist() == [0, 1, 1, 1, 2, 3]
+
+    for intercept in [0.1, 0.5, 0.8, 1.0]:
+        assert _recall(label_set, intercept) == _recall(labels, intercept)
+        assert _wss(label_set, intercept) == _wss(labels, intercept)
+        assert _erf(label_set, intercept) == _erf(labels, intercept)
+        assert _tp(label_set, intercept) == _tp(labels, intercept)
+        assert _tn(label_set, intercept) == _tn(labels, intercept)
+        assert _tnr(label_set, intercept) == _tnr(labels, intercept)
+    assert _loss_value(label_set) == _loss_value(labels)
+
+
+def test_curve_arrays():
+    labels = [1, 0, 1, 1, 0, 0]
+
+    x, y = _recall_values(labels)
+    assert x.dtype == np.float64 and y.dtype == np.float64
+    assert x.flags.c_contiguous and not x.flags.writeable
+
+    x, y = _recall_values(labels, x_absolute=True, y_absolute=True)
+    assert x.dtype == np.int32 and y.dtype == np.int32
+
+    x, y = _as_lists(_tp_values(labels, x_absolute=True))
+    assert x == [1, 2, 3]
+    assert y == [1, 2, 3]
+
+
+def test_multiple_intercepts():
+    labels = [1, 0, 1, 1, 0, 0, 0, 1, 0, 0]
+    intercepts = np.linspace(-0.1, 1.1, 25)
+
+    for metric in [_recall, _wss, _erf, _tp, _tn, _tnr]:
+        values = metric(labels, intercepts)
+
+        assert isinstance(values, np.ndarray)
+        assert_almost_equal(values, [metric(labels, v) for v in intercepts])
+
+
+def test_labels_memmap(tmp_path):
+    labels = [1, 0, 1, 1, 0, 0, 0, 1, 0, 0]
+    labels_memmap = np.memmap(
+        tmp_path / "labels.dat", dtype=np.uint8, mode="w+", shape=len(labels)
+    )
+    labels_memmap[:] = labels
+
+    for metric in [_recall, _wss, _erf, _tp, _tn, _tnr]:
+        assert metric(labels_memmap, 0.5) == metric(labels, 0.5)
+    assert _loss_value(labels_memmap) == _loss_value(labels)
+    assert _time_to_discovery(range(10), labels_memmap) == _time_to_discovery(
+        range(10), labels
+    )
+
+
+def test_label_matrix():
+    rng = np.random.default_rng(535)
+    runs = np.zeros((20, 100), dtype=np.uint8)
+    for run in runs:
+        run[rng.choice(100, 10, replace=False)] = 1
+    label_matrix = LabelMatrix(runs)
+
+    for values, matrix_values in [
+        (_recall_values, _recall_matrix_values),
+        (_wss_values, _wss_matrix_values),
+        (_erf_values, _erf_matrix_values),
+    ]:
+        x, y = matrix_values(label_matrix, x_absolute=True)
+        assert y.shape[0] == 20
+
+        for run, y_run in zip(runs, y, strict=True):
+            x_run, y_expected = values(run, x_absolute=True)
+            assert array_equal(x, x_run)
+            assert array_equal(y_run, y_expected)
+
+    assert_almost_equal(
+        _loss_matrix_values(label_matrix), [_loss_value(run) for run in runs]
+    )
+    assert array_equal(
+        _td_matrix_values(label_matrix), [np.flatnonzero(run) + 1 for run in runs]
+    )
+
+    for metric in [_recall, _wss, _erf]:
+        assert_almost_equal(
+            metric(label_matrix, [0.1, 0.5]),
+            [metric(run, [0.1, 0.5]) for run in runs],
+        )
+
+
+def test_label_matrix_unequal_relevant():
+    label_matrix = LabelMatrix([[1, 0, 0, 1], [1, 1, 1, 0]])
+
+    assert_almost_equal(_recall(label_matrix, 0.5), [0.5, 2 / 3])
+    with assert_raises(ValueError):
+        _wss_matrix_values(label_matrix)
+
+
+def test_sparse_metrics():
+    rng = np.random.default_rng(535)
+
+    for n_docs, n_pos_docs in [(2, 1), (7, 3), (100, 1), (1000, 999), (12345, 67)]:
+        labels = np.zeros(n_docs, dtype=np.uint8)
+        labels[rng.choice(n_docs, n_pos_docs, replace=False)] = 1
+        label_set = LabelSet.from_positions(np.flatnonzero(labels), n_docs)
+        assert label_set.n_pos_docs == n_pos_docs
+
+        random = np.round(np.linspace(0, n_pos_docs, n_docs))
+        assert array_equal(
+            label_set.positions_random,
+            np.searchsorted(random, np.arange(1, n_pos_docs + 1)),
+        )
+
+        # the sparse metrics equal the metrics sliced from the full curves
+        fractions = np.concatenate(
+            [[-1, 0, 1e-9, 0.5, 1, 2], np.arange(n_docs + 2) / n_docs]
+        )
+        for x_absolute, y_absolute in itertools.product([True, False], repeat=2):
+            intercepts = fractions * n_docs if x_absolute else fractions
+            for metric, values_func in [
+                (_recall, _recall_values),
+                (_erf, _erf_values),
+            ]:
+                x, y = values_func(labels, x_absolute, y_absolute)
+                expected = metrics._slice_metric(x, y, intercepts)
+                if metric is _recall:
+                    expected = np.where(intercepts < x[0], 0, expected)
+
+                values = metric(label_set, intercepts, x_absolute, y_absolute)
+                assert array_equal(values, expected)
+
+        dense = LabelSet(labels)
+        tp = dense.tp[dense.positions]
+        fp = dense.fp[dense.positions]
+        assert array_equal(_tp_values(label_set)[1], tp)
+        assert array_equal(_fp_values(label_set)[1], fp)
+        assert array_equal(_tn_values(label_set)[1], n_docs - n_pos_docs - fp)
+        assert array_equal(_fn_values(label_set)[1], n_pos_docs - tp)
+        if n_pos_docs < n_docs:
+            assert _loss_value(label_set) == (
+                (n_pos_docs * (n_docs - (n_pos_docs - 1) / 2) - dense.tp.sum())
+                / (n_pos_docs * (n_docs - n_pos_docs))
+            )
+
+        # the full curves are not created for the metrics
+        assert "tp" not in label_set.__dict__
+        assert "random" not in label_set.__dict__
+
+
 def test_time_to_disc():
     labels = [1, 1, 0, 1]
     td = _time_to_discovery([3, 2, 0, 1], labels)
@@ -184,3 +360,27 @@ def test_get_metrics():
 
     for erf_score in erf_values.values():
         assert 0 <= erf_score <= 1, f"ERF value {wss_score} out of expected range"
+
+
+def test_get_metrics_priors(monkeypatch):
+    fp = Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_stop_if_min.asreview")
+
+    n_reads = 0
+    read_simulation_results = metrics.read_simulation_results
+
+    def count_reads(*args, **kwargs):
+        nonlocal n_reads
+        n_reads += 1
+        return read_simulation_results(*args, **kwargs)
+
+    monkeypatch.setattr(metrics, "read_simulation_results", count_reads)
+
+    for priors in [True, False]:
+        result = get_metrics(fp, priors=priors)
+        td = next(
+            item["value"] for item in result["data"]["items"] if item["id"] == "td"
+        )
+
+        assert td == time_to_discovery(fp, priors=priors)
+
+    assert n_reads == 4
@@ -1,11 +1,18 @@
 from pathlib import Path
 
 import matplotlib.pyplot as plt
+import numpy as np
+import pytest
 
+from asreviewcontrib.insights.algorithms import _recall_values
+from asreviewcontrib.insights.plot import _compress_step
+from asreviewcontrib.insights.plot import _decimate_step
+from asreviewcontrib.insights.plot import _n_pixels
 from asreviewcontrib.insights.plot import _plot_erf
 from asreviewcontrib.insights.plot import _plot_recall
 from asreviewcontrib.insights.plot import _plot_wss
 from asreviewcontrib.insights.plot import plot_erf
+from asreviewcontrib.insights.plot import plot_multiple
 from asreviewcontrib.insights.plot import plot_recall
 from asreviewcontrib.insights.plot import plot_wss
 
@@ -40,6 +47,89 @@ def test_plot_recall_small_data():
     fig.savefig(Path(TEST_FIGURES, "tests_small_dataset_recall.png"))
 
 
+def test_plot_recall_arrays():
+    labels = np.array([SMALL_DATA, [0, 1, 1, 0, 1], [1, 1, 1, 0, 0]])
+
+    fig, ax = plt.subplots()
+    _plot_recall(ax, labels, show_random=False, show_legend=False)
+    assert len(ax.get_lines()) == 4
+
+    fig, ax = plt.subplots()
+    _plot_recall(ax, list(labels), show_random=False, show_legend=False)
+    assert len(ax.get_lines()) == 4
+
+    fig, ax = plt.subplots()
+    _plot_wss(ax, labels[0])
+    assert len(ax.get_lines()) == 1
+
+
+def test_plot_aggregate():
+    labels = np.array([SMALL_DATA, [0, 1, 1, 0, 1], [1, 1, 1, 0, 0]])
+
+    fig, ax = plt.subplots()
+    _plot_recall(ax, labels, show_random=False, show_optimal=False, aggregate=True)
+    assert len(ax.get_lines()) == 1
+    assert len(ax.collections) == 1
+    line = ax.get_lines()[0]
+    mean_recall = np.mean(np.cumsum(labels, axis=1) / 3, axis=0)
+    np.testing.assert_allclose(
+        line.get_ydata(), mean_recall[np.round(line.get_xdata() * 5).astype(int) - 1]
+    )
+
+    fig, ax = plt.subplots()
+    _plot_wss(ax, list(labels), aggregate="median", quantiles=(0.25, 0.75))
+    assert len(ax.collections) == 1
+
+    fig, ax = plt.subplots()
+    _plot_erf(ax, [SMALL_DATA, [0, 1, 1, 0, 1]], aggregate="mean")
+    assert len(ax.collections) == 1
+
+    with pytest.raises(ValueError):
+        _plot_recall(ax, [SMALL_DATA, [0, 1, 1]], aggregate=True)
+
+
+def test_compress_step():
+    labels = np.zeros(1000, dtype=np.uint8)
+    labels[[0, 3, 10, 500]] = 1
+    x, y = _recall_values(labels)
+
+    x_compressed, y_compressed = _compress_step(x, y)
+    assert len(x_compressed) == 5
+    assert x_compressed[[0, -1]].tolist() == [x[0], x[-1]]
+
+    # the step curve is the same at every point of the full curve
+    i = np.searchsorted(x_compressed, x, side="right") - 1
+    assert (y_compressed[i] == y).all()
+
+
+def test_decimate_step():
+    rng = np.random.default_rng(535)
+    x = np.arange(1, 10001)
+    y = rng.random((2, 10000))
+
+    x_decimated, y_decimated = _decimate_step(x, y, 100)
+    assert len(x_decimated) <= 4 * 100 * 2 + 2 * 100
+    assert x_decimated[[0, -1]].tolist() == [1, 10000]
+    assert y_decimated.max(axis=1).tolist() == y.max(axis=1).tolist()
+    assert y_decimated.min(axis=1).tolist() == y.min(axis=1).tolist()
+
+    x_decimated, y_decimated = _decimate_step(x[:100], y[0, :100], 100)
+    assert (y_decimated == y[0, :100]).all()
+
+
+def test_plot_decimate():
+    labels = np.zeros(100000, dtype=np.uint8)
+    labels[np.random.default_rng(535).choice(100000, 1000, replace=False)] = 1
+
+    fig, ax = plt.subplots()
+    _plot_recall(ax, labels, show_random=False, show_optimal=False)
+    assert len(ax.get_lines()[0].get_xdata()) <= 1002
+
+    fig, ax = plt.subplots()
+    _plot_erf(ax, labels, decimate=True)
+    assert len(ax.get_lines()[0].get_xdata()) < 4 * _n_pixels(ax) + 1
+
+
 def test_plot_recall():
     fp = Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_stop_if_min.asreview")
     fig, ax = plt.subplots()
@@ -59,6 +149,52 @@ def test_plot_multiple_recall():
     fig.savefig(Path(TEST_FIGURES, "tests_multiple_recall_sim_van_de_schoot_2017.png"))
 
 
+def test_plot_multiple_recall_parallel():
+    fps = [
+        Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_stop_if_min.asreview"),
+        Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_logistic.asreview"),
+    ]
+    fig, ax = plt.subplots()
+    plot_recall(ax, fps, n_jobs=2)
+
+    fig_serial, ax_serial = plt.subplots()
+    plot_recall(ax_serial, fps)
+
+    assert [line.get_label() for line in ax.get_lines()] == [
+        line.get_label() for line in ax_serial.get_lines()
+    ]
+    for line, line_serial in zip(ax.get_lines(), ax_serial.get_lines(), strict=True):
+        assert (line.get_ydata() == line_serial.get_ydata()).all()
+
+
+@pytest.mark.parametrize("aggregate", [False, "mean"])
+def test_plot_multiple_types(aggregate):
+    fps = [
+        Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_stop_if_min.asreview"),
+        Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_stop_if_full.asreview"),
+    ]
+    fig, axes = plt.subplots(1, 3)
+    plot_multiple(axes, fps, ["recall", "wss", "erf"], aggregate=aggregate)
+
+    # the same curves as plotting each plot type separately
+    for ax, plot_func in zip(axes, [plot_recall, plot_wss, plot_erf], strict=True):
+        _, ax_single = plt.subplots()
+        plot_func(ax_single, fps, aggregate=aggregate)
+
+        assert [line.get_label() for line in ax.get_lines()] == [
+            line.get_label() for line in ax_single.get_lines()
+        ]
+        for line, line_single in zip(
+            ax.get_lines(), ax_single.get_lines(), strict=True
+        ):
+            assert np.array_equal(line.get_xydata(), line_single.get_xydata())
+
+    with pytest.raises(ValueError):
+        plot_multiple(axes[:2], fps, ["recall", "wss", "erf"])
+    with pytest.raises(ValueError):
+        plot_multiple(axes[:1], fps, ["precision"])
+
+
 def test_plot_wss():
     fp = Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_stop_if_min.asreview")
     fig, ax = plt.subplots()
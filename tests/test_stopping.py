@@ -0,0 +1,100 @@
+import numpy as np
+from numpy import array_equal
+from numpy.testing import assert_raises
+
+from asreviewcontrib.insights.algorithms import LabelMatrix
+from asreviewcontrib.insights.stopping import evaluate_stopping_rules
+from asreviewcontrib.insights.stopping import stop_consecutive_irrelevant
+from asreviewcontrib.insights.stopping import stop_hit_rate
+from asreviewcontrib.insights.stopping import stop_screened_fraction
+
+
+def _stop_consecutive_loop(labels, n):
+    n_irrelevant = 0
+    for i, label in enumerate(labels):
+        n_irrelevant = 0 if label else n_irrelevant + 1
+        if n_irrelevant >= n:
+            return i + 1
+    return len(labels)
+
+
+def _stop_hit_rate_loop(labels, window, threshold):
+    for i in range(window - 1, len(labels)):
+        if sum(labels[i - window + 1 : i + 1]) / window < threshold:
+            return i + 1
+    return len(labels)
+
+
+def test_stopping_rules():
+    rng = np.random.default_rng(0)
+
+    for _ in range(50):
+        n_docs = int(rng.integers(1, 60))
+        labels = (rng.random((3, n_docs)) < rng.random()).astype(np.uint8)
+
+        n = [1, 2, 5, 100]
+        expected = [[_stop_consecutive_loop(row, v) for v in n] for row in labels]
+        assert array_equal(stop_consecutive_irrelevant(labels, n), expected)
+
+        threshold = [0, 0.1, 1 / 3, 0.5, 1]
+        for window in [1, 3, 10, 100]:
+            expected = [
+                [_stop_hit_rate_loop(row, window, t) for t in threshold]
+                for row in labels
+            ]
+            assert array_equal(stop_hit_rate(labels, window, threshold), expected)
+
+    assert array_equal(
+        stop_screened_fraction(np.zeros((2, 10)), [0, 0.25, 1]), [[0, 3, 10]] * 2
+    )
+
+    # thresholds of which the product with the size is not exact in floating
+    # point, e.g. 0.07 * 100 = 7.000000000000001
+    assert array_equal(
+        stop_screened_fraction(np.zeros((1, 100)), [0.07, 0.29]), [[7, 29]]
+    )
+    for n_hits in [7, 29]:
+        labels = np.zeros((1, 200), dtype=np.uint8)
+        labels[0, :n_hits] = 1
+        threshold = n_hits / 100
+        assert stop_hit_rate(labels, 100, threshold)[0, 0] == _stop_hit_rate_loop(
+            labels[0], 100, threshold
+        )
+        # a window with exactly the threshold is not below it
+        assert stop_hit_rate(labels, 100, threshold)[0, 0] == 101
+
+    with assert_raises(ValueError):
+        stop_consecutive_irrelevant(np.zeros((2, 10)), 0)
+    with assert_raises(ValueError):
+        stop_hit_rate(np.zeros((2, 10)), 0, 0.1)
+
+
+def test_evaluate_stopping_rules():
+    labels = [[1, 0, 1, 0, 0, 0, 1, 0, 0, 0], [0, 1, 1, 1, 0, 0, 0, 0, 0, 0]]
+
+    results = evaluate_stopping_rules(
+        LabelMatrix(labels),
+        consecutive=[3],
+        fraction=[0.5],
+        window=[2, 4],
+        threshold=[0.5],
+    )
+
+    assert [(r["rule"], r["parameters"]) for r in results] == [
+        ("consecutive", {"n": 3}),
+        ("fraction", {"fraction": 0.5}),
+        ("hit_rate", {"window": 2, "threshold": 0.5}),
+        ("hit_rate", {"window": 4, "threshold": 0.5}),
+    ]
+
+    consecutive = results[0]
+    assert array_equal(consecutive["n_screened"], [6, 7])
+    assert array_equal(consecutive["recall"], [2 / 3, 1])
+    assert array_equal(consecutive["work_saved"], [0.4, 0.3])
+
+    assert array_equal(results[1]["recall"], [2 / 3, 1])
+    assert array_equal(results[2]["n_screened"], [5, 6])
+    assert array_equal(results[3]["n_screened"], [5, 7])
+
+    with assert_raises(ValueError):
+        evaluate_stopping_rules(labels, window=[10])
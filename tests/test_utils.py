@@ -0,0 +1,49 @@
+import zipfile
+from pathlib import Path
+
+from synthetic import make_asreview_file
+
+from asreviewcontrib.insights.utils import get_simulation_labels
+from asreviewcontrib.insights.utils import read_simulation_results
+
+TEST_ASREVIEW_FILES = Path(Path(__file__).parent, "asreview_files")
+
+
+def test_read_simulation_results():
+    fp = Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_stop_if_min.asreview")
+    results = read_simulation_results(fp)
+
+    assert results.n_records >= len(results.labels)
+    assert len(results.record_ids) == len(results.labels) == len(results.is_prior)
+    assert results.n_priors > 0
+    assert results.is_prior[: results.n_priors].all()
+
+
+def test_simulation_labels_project_folder(tmp_path):
+    fp = Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_stop_if_min.asreview")
+    with zipfile.ZipFile(fp) as archive:
+        archive.extractall(tmp_path)
+
+    for priors in [True, False]:
+        labels = get_simulation_labels(fp, priors=priors)
+
+        assert get_simulation_labels(tmp_path, priors=priors) == labels
+
+
+def test_read_synthetic_file(tmp_path):
+    fp = Path(tmp_path, "synthetic.asreview")
+    labels, order, n_priors = make_asreview_file(
+        fp, 1000, prevalence=0.05, n_priors=4, stop_if="min", seed=535
+    )
+    results = read_simulation_results(fp)
+
+    assert results.n_records == 1000
+    assert results.n_priors == n_priors == 4
+    assert results.record_ids.tolist() == order.tolist()
+    assert results.labels.tolist() == labels[order].tolist()
+    assert results.labels.sum() == 50
+    assert results.labels[-1] == 1
+
+    assert get_simulation_labels(fp) == labels[order[4:]].tolist() + [0] * (
+        1000 - len(order)
+    )
@@ -0,0 +1,96 @@
+import sqlite3
+import zipfile
+from pathlib import Path
+
+import pytest
+from synthetic import make_asreview_file
+
+from asreviewcontrib.insights.metrics import get_metrics
+from asreviewcontrib.insights.watch import ReviewWatcher
+from asreviewcontrib.insights.watch import watch
+
+TEST_ASREVIEW_FILES = Path(Path(__file__).parent, "asreview_files")
+
+
+def _results_db(project_dir):
+    return next(Path(project_dir, "reviews").glob("*/results.db"))
+
+
+@pytest.fixture
+def live_review(tmp_path):
+    """Project folder of a review in progress, with the rows still to label."""
+    fp = Path(tmp_path, "sim.asreview")
+    make_asreview_file(fp, 300, prevalence=0.1, n_priors=4, seed=0)
+
+    project_dir = Path(tmp_path, "project")
+    with zipfile.ZipFile(fp) as archive:
+        archive.extractall(project_dir)
+
+    with sqlite3.connect(_results_db(project_dir)) as con:
+        rows = con.execute(
+            "SELECT record_id, label, classifier, querier, time FROM results "
+            "ORDER BY rowid"
+        ).fetchall()
+        con.execute("DELETE FROM results")
+    con.close()
+
+    return project_dir, rows
+
+
+def _insert(project_dir, rows, labeled=True):
+    with sqlite3.connect(_results_db(project_dir)) as con:
+        con.executemany(
+            "INSERT INTO results (record_id, label, classifier, querier, time) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(r[0], r[1] if labeled else None, *r[2:]) for r in rows],
+        )
+    con.close()
+
+
+def _label(project_dir, rows):
+    with sqlite3.connect(_results_db(project_dir)) as con:
+        con.executemany(
+            "UPDATE results SET label = ? WHERE record_id = ?",
+            [(r[1], r[0]) for r in rows],
+        )
+    con.close()
+
+
+@pytest.mark.parametrize("priors", [False, True])
+def test_review_watcher(live_review, priors):
+    project_dir, rows = live_review
+    watcher = ReviewWatcher(project_dir, priors=priors)
+
+    _insert(project_dir, rows[:10])
+    assert watcher.update()
+    assert watcher.get_metrics() == get_metrics(project_dir, priors=priors)
+    assert not watcher.update()
+
+    # rows waiting for a label are skipped until they are labeled, labeled
+    # rows after them are read again
+    _insert(project_dir, rows[10:15], labeled=False)
+    _insert(project_dir, rows[15:40])
+    assert watcher.update()
+    assert watcher.get_metrics() == get_metrics(project_dir, priors=priors)
+
+    _label(project_dir, rows[10:15])
+    _insert(project_dir, rows[40:])
+    assert watcher.update()
+    assert watcher._next_rowid == len(rows) + 1
+    assert watcher.get_metrics() == get_metrics(project_dir, priors=priors)
+
+    # changed labels are detected with the decision changes
+    with sqlite3.connect(_results_db(project_dir)) as con:
+        con.execute("UPDATE results SET label = 1 - label WHERE rowid = 20")
+        con.execute("INSERT INTO decision_changes (record_id) VALUES (0)")
+    con.close()
+    assert watcher.update()
+    assert watcher.get_metrics() == get_metrics(project_dir, priors=priors)
+
+
+def test_watch_asreview_file():
+    fp = Path(TEST_ASREVIEW_FILES, "sim_van_de_schoot_2017_stop_if_min.asreview")
+    watcher = ReviewWatcher(fp)
+
+    assert list(watch([watcher], interval=0, n_polls=2)) == [watcher]
+    assert watcher.get_metrics() == get_metrics(fp)